@@ -12,10 +12,10 @@ from views.interview import render_interview_view
 from views.result import render_result_view
 from styles import apply_styles, get_global_styles
 import database as db
-import os
 from dotenv import load_dotenv
 from datetime import datetime
-from langchain_utils import InterviewCoach
+from langchain_utils import InterviewCoach, get_coach
+from providers import configured_providers, provider_api_key, provider_label
 
 # ==========================================
 # PAGE CONFIGURATION
@@ -33,6 +33,8 @@ load_dotenv()
 
 # Initialize database
 db.init_db()
+# Compress transcripts stored before the compressed format, off the request path
+db.start_conversation_migration()
 
 # Apply custom CSS styling - both methods for compatibility
 apply_styles()
@@ -64,12 +66,12 @@ def initialize_session_state():
         if key not in st.session_state:
             st.session_state[key] = value
     
-    # Initialize AI Coach
+    # Initialize AI Coach (shared across sessions using the same key)
     if 'coach' not in st.session_state:
-        st.session_state.coach = InterviewCoach()
-        api_key = os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY')
-        if api_key:
-            st.session_state.coach.configure(api_key)
+        # Provider keys come from the environment (OPENAI_API_KEY, GEMINI_API_KEY, ...);
+        # the fake backend and cassette replay need none
+        coach = get_coach(provider_api_key(configured_providers()[0]))
+        st.session_state.coach = coach if coach.api_key else InterviewCoach()
 
 # Initialize session
 initialize_session_state()
@@ -154,17 +156,17 @@ def render_sidebar():
             
             # API Configuration
             st.subheader("🔑 API Configuration", anchor=False)
-            api_key = os.getenv('GOOGLE_API_KEY')
+            provider = configured_providers()[0]
             
-            if not api_key:
+            if not st.session_state.coach.api_key:
                 api_key = st.text_input(
-                    "Enter Google API Key",
+                    f"Enter {provider_label(provider)} API Key",
                     type="password",
-                    placeholder="sk-...",
+                    placeholder="sk-..." if provider == "openai" else "",
                     key="api_key_input"
                 )
                 if api_key:
-                    st.session_state.coach.configure(api_key)
+                    st.session_state.coach = get_coach(api_key)
                     st.success("✅ API Configured")
             else:
                 st.success("✅ API Key Loaded")
@@ -0,0 +1,169 @@
+"""
+Offline (re)grading of stored interviews.
+
+Streams transcripts from the interviews table in id order, grades them
+concurrently on the shared LLM pool's background lane and writes scores
+back in batched transactions. Progress is checkpointed to a JSON file so
+an interrupted run picks up where it stopped:
+
+    python batch_grade.py --rubric-version 2025-06 --concurrency 16
+    python batch_grade.py --rubric-version 2025-06   # resumes from the checkpoint
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import database as db
+from history import count_tokens
+from llm_runtime import get_pool
+
+DEFAULT_CHECKPOINT = "grade_checkpoint.json"
+
+
+class Checkpoint:
+    """Highest interview id whose grade is safely written, per rubric version."""
+
+    def __init__(self, path, rubric_version, restart=False):
+        self.path = path
+        self.rubric_version = rubric_version
+        self.last_id = 0
+        self.graded = 0
+        self.failed_ids = []
+        if not restart and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("rubric_version") == rubric_version:
+                self.last_id = data.get("last_id", 0)
+                self.graded = data.get("graded", 0)
+                self.failed_ids = data.get("failed_ids", [])
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                "rubric_version": self.rubric_version,
+                "last_id": self.last_id,
+                "graded": self.graded,
+                "failed_ids": self.failed_ids,
+                "updated_at": time.time()
+            }, f)
+        # Atomic on POSIX and Windows: a crash never leaves a torn checkpoint
+        os.replace(tmp, self.path)
+
+
+def grade_interviews(coach, checkpoint, concurrency=8, batch_size=100, page_size=500, limit=None):
+    """Grade every interview after the checkpoint that lacks this rubric version."""
+    pool = get_pool()
+    slots = threading.BoundedSemaphore(concurrency)
+    results = queue.Queue()
+    pending = []        # submitted ids not yet written, ascending
+    grades = []
+    submitted = 0
+    last_submitted = checkpoint.last_id
+    started = time.perf_counter()
+
+    def finished(interview_id, future):
+        slots.release()
+        try:
+            results.put((interview_id, future.result(), None))
+        except Exception as e:
+            results.put((interview_id, None, e))
+
+    def flush():
+        if grades:
+            db.save_interview_grades(grades, checkpoint.rubric_version)
+            checkpoint.graded += len(grades)
+            grades.clear()
+        # Everything submitted below the oldest in-flight id is written
+        checkpoint.last_id = pending[0] - 1 if pending else last_submitted
+        checkpoint.save()
+        elapsed = time.perf_counter() - started
+        print(f"  graded {checkpoint.graded}, failed {len(checkpoint.failed_ids)}, "
+              f"through id {checkpoint.last_id} ({elapsed:.0f}s)")
+
+    def handle(interview_id, grade, error):
+        pending.remove(interview_id)
+        if error is not None or grade.get("final_score") is None:
+            checkpoint.failed_ids.append(interview_id)
+            print(f"  interview {interview_id}: failed ({error or 'no score'})")
+        else:
+            grades.append((interview_id, grade["final_score"], grade["verdict"]))
+        if len(grades) >= batch_size:
+            flush()
+
+    def drain(block=False):
+        while True:
+            try:
+                handle(*results.get(block=block))
+            except queue.Empty:
+                return
+            block = False
+
+    rows = db.iter_interviews_for_grading(checkpoint.last_id, checkpoint.rubric_version, page_size)
+    for row in rows:
+        if limit is not None and submitted >= limit:
+            break
+        messages = row['messages']
+        if not messages:
+            checkpoint.failed_ids.append(row['id'])
+            continue
+
+        slots.acquire()
+        drain()
+        interview_id = row['id']
+        pending.append(interview_id)
+        future = pool.submit(
+            lambda messages=messages, role=row['role']: coach.agrade_transcript(messages, role),
+            timeout=None,
+            lane="background",
+            user="batch-grade",
+            tokens=sum(count_tokens(m.get("content") or "") for m in messages) + 200
+        )
+        future.add_done_callback(lambda f, interview_id=interview_id: finished(interview_id, f))
+        submitted += 1
+        last_submitted = interview_id
+
+    while pending:
+        drain(block=True)
+    flush()
+    return checkpoint
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regrade stored interview transcripts.")
+    parser.add_argument("--rubric-version", required=True,
+                        help="label stored with each grade; interviews already graded with it are skipped")
+    parser.add_argument("--concurrency", type=int, default=8, help="grading calls in flight")
+    parser.add_argument("--batch-size", type=int, default=100, help="grades per write transaction")
+    parser.add_argument("--page-size", type=int, default=500, help="rows read per query")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many interviews")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore the checkpoint and rescan (retries failures; graded rows are still skipped)")
+    parser.add_argument("--model", default=os.getenv("LLM_MODEL", "gpt-4o-mini"))
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from langchain_utils import get_coach
+
+    load_dotenv()
+    coach = get_coach(None, model=args.model)
+    if not coach.api_key:
+        print("No API key configured (set OPENAI_API_KEY or the key of a provider in LLM_PROVIDERS).")
+        return 1
+
+    db.init_db()
+    checkpoint = Checkpoint(args.checkpoint, args.rubric_version, restart=args.restart)
+    if checkpoint.last_id:
+        print(f"Resuming after interview {checkpoint.last_id} ({checkpoint.graded} already graded)")
+    grade_interviews(coach, checkpoint, args.concurrency, args.batch_size, args.page_size, args.limit)
+    print(f"Done: {checkpoint.graded} graded, {len(checkpoint.failed_ids)} failed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
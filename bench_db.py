@@ -0,0 +1,115 @@
+"""
+Micro-benchmark for the database layer under concurrent sessions.
+
+Runs a mixed read/write workload (past-interview lookups, resume lookups,
+interview saves) from N threads against a scratch database, once with the
+pooled WAL connections and once with the old connect-per-call setup, and
+reports ops/sec and lock errors for each. Writes go through the writer
+thread in both modes; each run's time includes waiting for them to commit:
+
+    python bench_db.py --threads 1 4 16 --seconds 5
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import threading
+import database as db
+
+
+def _legacy_connection():
+    # What get_db_connection() did before pooling: a fresh rollback-journal
+    # connection per call
+    conn = sqlite3.connect(db.DB_NAME)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _seed(users):
+    conn = db.get_db_connection()
+    with conn:
+        conn.executemany('INSERT INTO users (username, password) VALUES (?, ?)',
+                         [(f"user{i}", db.hash_password("pw")) for i in range(users)])
+    conn.close()
+    db.cache_resume("bench", "Experienced engineer. " * 200, 2)
+    for user_id in range(1, users + 1):
+        db.set_user_resume(user_id, "bench", "resume.pdf")
+    db.flush_writes()
+
+
+def _workload(users, write_share, deadline, counts, lock):
+    rng = random.Random()
+    messages = [{"role": "assistant", "content": "Tell me about yourself."},
+                {"role": "user", "content": "I build backend services. " * 20}]
+    ops = errors = 0
+    while time.perf_counter() < deadline:
+        user_id = rng.randint(1, users)
+        try:
+            if rng.random() < write_share:
+                db.save_interview(user_id, "Backend Engineer", messages, 7.5, "SELECTED")
+            elif rng.random() < 0.5:
+                db.get_user_interviews(user_id)
+            else:
+                db.get_user_resume(user_id)
+            ops += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    with lock:
+        counts["ops"] += ops
+        counts["errors"] += errors
+
+
+def run(mode, threads, seconds, users, write_share):
+    """ops/sec and error count for one mode ("pooled" or "legacy") and thread count."""
+    directory = tempfile.mkdtemp(prefix="bench_db_")
+    db.DB_NAME = os.path.join(directory, "bench.db")
+    pooled_connection = db.get_db_connection
+    if mode == "legacy":
+        db.get_db_connection = _legacy_connection
+    try:
+        db.init_db(force=True)
+        _seed(users)
+        counts = {"ops": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+        workers = [
+            threading.Thread(target=_workload, args=(users, write_share, deadline, counts, lock))
+            for _ in range(threads)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        db.flush_writes(timeout=None)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close_writers()
+        db.get_db_connection = pooled_connection
+        db.close_pools()
+    return counts["ops"] / elapsed, counts["errors"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark database.py under concurrent threads.")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration of each run")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--write-share", type=float, default=0.2, help="fraction of operations that write")
+    parser.add_argument("--modes", nargs="+", default=["legacy", "pooled"], choices=["legacy", "pooled"])
+    args = parser.parse_args(argv)
+
+    print(f"{'mode':<8} {'threads':>7} {'ops/sec':>10} {'lock errors':>12}")
+    for threads in args.threads:
+        for mode in args.modes:
+            rate, errors = run(mode, threads, args.seconds, args.users, args.write_share)
+            print(f"{mode:<8} {threads:>7} {rate:>10.0f} {errors:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
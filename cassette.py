@@ -0,0 +1,249 @@
+"""
+Record/replay of LLM traffic for repeatable regression benchmarks.
+
+With LLM_CASSETTE_MODE=record every model call is passed through to the
+real provider and its prompt, raw reply, token usage and timing are
+appended to a cassette file. With LLM_CASSETTE_MODE=replay the same calls
+are answered from the cassette by prompt hash, so recorded interview
+sessions can be replayed against new code without touching the API:
+
+    LLM_CASSETTE_MODE=record LLM_CASSETTE_PATH=cassettes/june.jsonl.gz
+    LLM_CASSETTE_MODE=replay LLM_CASSETTE_TIMING=1    # keep the original latency
+
+Cassettes are JSON lines, gzip-compressed when the path ends in ``.gz``.
+A prompt recorded several times is replayed round-robin.
+"""
+
+import os
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Any, List, Optional
+from pydantic import ConfigDict
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+DEFAULT_CASSETTE = "llm_cassette.jsonl.gz"
+MODES = ("off", "record", "replay")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode for a prompt the cassette never recorded."""
+
+
+def prompt_key(model, messages):
+    """Stable hash of the model name and the rendered prompt messages."""
+    digest = hashlib.sha256(model.encode())
+    for message in messages:
+        digest.update(b"\x00" + message.type.encode() + b"\x00" + str(message.content).encode())
+    return digest.hexdigest()
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Cassette:
+    """On-disk list of recorded calls, indexed by prompt hash."""
+
+    def __init__(self, path):
+        self.path = path
+        self._records = {}
+        self._next = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with _open(path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._records.setdefault(record["key"], []).append(record)
+
+    def __len__(self):
+        return sum(len(records) for records in self._records.values())
+
+    def lookup(self, key):
+        with self._lock:
+            records = self._records.get(key)
+            if not records:
+                raise CassetteMissError(f"No recorded reply for prompt {key[:12]} in {self.path}")
+            index = self._next.get(key, 0)
+            self._next[key] = index + 1
+            return records[index % len(records)]
+
+    def append(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._records.setdefault(record["key"], []).append(record)
+            # Each append is its own gzip member; readers see them as one stream
+            with _open(self.path, "a") as f:
+                f.write(line)
+
+
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path):
+    """Process-wide cassette for ``path`` so every chain shares one index."""
+    path = os.path.abspath(path)
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path)
+        return _cassettes[path]
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model that records the wrapped model's traffic or replays it."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    inner: Optional[BaseChatModel] = None
+    cassette: Cassette
+    mode: str = "replay"
+    model_name: str = ""
+    emulate_timing: bool = False
+
+    @property
+    def _llm_type(self):
+        return "cassette"
+
+    # -- recording -----------------------------------------------------
+
+    def _record(self, messages, text, usage, ttft, total, chunks):
+        self.cassette.append({
+            "key": prompt_key(self.model_name, messages),
+            "model": self.model_name,
+            "prompt": [[m.type, str(m.content)] for m in messages],
+            "text": text,
+            "usage": usage,
+            "ttft": round(ttft, 4),
+            "total": round(total, 4),
+            "chunks": chunks,
+            "recorded_at": time.time(),
+        })
+
+    def _recorded_result(self, messages, reply, started):
+        total = time.perf_counter() - started
+        usage = getattr(reply, "usage_metadata", None)
+        self._record(messages, str(reply.content), usage, total, total, 1)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply.content, usage_metadata=usage))])
+
+    def _recording_stream(self, messages, started):
+        """Accumulates streamed chunks; returns a callback that writes the record."""
+        state = {"text": [], "usage": None, "ttft": None, "chunks": 0}
+
+        def add(chunk):
+            if chunk.content:
+                if state["ttft"] is None:
+                    state["ttft"] = time.perf_counter() - started
+                state["text"].append(str(chunk.content))
+                state["chunks"] += 1
+            if getattr(chunk, "usage_metadata", None):
+                state["usage"] = chunk.usage_metadata
+
+        def done():
+            total = time.perf_counter() - started
+            self._record(messages, "".join(state["text"]), state["usage"],
+                         state["ttft"] if state["ttft"] is not None else total, total, state["chunks"])
+
+        return add, done
+
+    # -- replay --------------------------------------------------------
+
+    def _replay(self, messages):
+        record = self.cassette.lookup(prompt_key(self.model_name, messages))
+        text = record["text"]
+        chunks = max(record.get("chunks") or 1, 1)
+        size = max(-(-len(text) // chunks), 1)
+        pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        ttft = record["ttft"] if self.emulate_timing else 0.0
+        gap = (max(record["total"] - record["ttft"], 0.0) / len(pieces)) if self.emulate_timing else 0.0
+        return record, pieces, ttft, gap
+
+    @staticmethod
+    def _replayed_result(record):
+        message = AIMessage(content=record["text"], usage_metadata=record.get("usage"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    # -- BaseChatModel interface ---------------------------------------
+
+    def _generate(self, messages: List[Any], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.mode == "record":
+            started = time.perf_counter()
+            return self._recorded_result(messages, self.inner.invoke(messages, stop=stop, **kwargs), started)
+        record, pieces, ttft, gap = self._replay(messages)
+        time.sleep(ttft + gap * len(pieces))
+        return self._replayed_result(record)
+
+    async def _agenerate(self, messages: List[Any], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.mode == "record":
+            started = time.perf_counter()
+            return self._recorded_result(messages, await self.inner.ainvoke(messages, stop=stop, **kwargs), started)
+        record, pieces, ttft, gap = self._replay(messages)
+        await asyncio.sleep(ttft + gap * len(pieces))
+        return self._replayed_result(record)
+
+    def _stream(self, messages: List[Any], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any):
+        if self.mode == "record":
+            add, done = self._recording_stream(messages, time.perf_counter())
+            for chunk in self.inner.stream(messages, stop=stop, **kwargs):
+                add(chunk)
+                yield ChatGenerationChunk(message=chunk)
+            done()
+            return
+        record, pieces, ttft, gap = self._replay(messages)
+        time.sleep(ttft)
+        for piece in pieces:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            time.sleep(gap)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=record.get("usage")))
+
+    async def _astream(self, messages: List[Any], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any):
+        if self.mode == "record":
+            add, done = self._recording_stream(messages, time.perf_counter())
+            async for chunk in self.inner.astream(messages, stop=stop, **kwargs):
+                add(chunk)
+                yield ChatGenerationChunk(message=chunk)
+            done()
+            return
+        record, pieces, ttft, gap = self._replay(messages)
+        await asyncio.sleep(ttft)
+        for piece in pieces:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            await asyncio.sleep(gap)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=record.get("usage")))
+
+
+def cassette_mode():
+    """LLM_CASSETTE_MODE: "off" (default), "record" or "replay"."""
+    mode = os.getenv("LLM_CASSETTE_MODE", "off").lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM_CASSETTE_MODE: {mode}")
+    return mode
+
+
+def wrap_llm(llm, model, mode=None):
+    """
+    Wrap ``llm`` for the configured cassette mode. Returns ``llm`` unchanged
+    when cassettes are off; in replay mode ``llm`` may be None.
+    """
+    mode = mode or cassette_mode()
+    if mode == "off":
+        return llm
+    return CassetteChatModel(
+        inner=llm,
+        cassette=get_cassette(os.getenv("LLM_CASSETTE_PATH", DEFAULT_CASSETTE)),
+        mode=mode,
+        model_name=model,
+        emulate_timing=os.getenv("LLM_CASSETTE_TIMING", "0") == "1",
+    )
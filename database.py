@@ -1,17 +1,372 @@
+import os
+import time
+import zlib
 import sqlite3
 import hashlib
 import json
+import queue
+import atexit
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from datetime import datetime
 
 DB_NAME = "interview_app.db"
 
+# Connection settings, applied once when a pooled connection is opened
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", "256"))
+
+def _ensure_column(c, table, column, definition):
+    """Add a column to an existing table if an older database lacks it."""
+    columns = {row[1] for row in c.execute(f'PRAGMA table_info({table})')}
+    if column not in columns:
+        c.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+# ==========================================
+# CONNECTION POOL
+# ==========================================
+
+class PooledConnection(sqlite3.Connection):
+    """A connection whose ``close()`` hands it back to its pool instead of closing it."""
+    
+    pool = None
+    
+    def close(self):
+        if self.pool is None:
+            return super().close()
+        if self.in_transaction:
+            # Never hand a half-finished transaction to the next caller
+            self.rollback()
+        self.pool.release(self)
+    
+    def _close(self):
+        super().close()
+
+class ConnectionPool:
+    """
+    Keeps up to ``size`` idle WAL-mode connections to one database file.
+    
+    Connections are configured once when opened (WAL, synchronous=NORMAL,
+    busy timeout, mmap, statement cache) and reused across threads, so
+    callers keep the open/close pattern without paying for a new connection
+    each time. When every connection is busy a new one is opened; extras
+    are closed on release rather than kept.
+    """
+    
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            factory=PooledConnection,
+            cached_statements=STATEMENT_CACHE,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+        conn.pool = self
+        return conn
+    
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+    
+    def release(self, conn):
+        with self._lock:
+            if self._idle.qsize() < self.size:
+                self._idle.put_nowait(conn)
+                return
+        conn._close()
+    
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait()._close()
+            except queue.Empty:
+                return
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _get_pool():
+    with _pools_lock:
+        pool = _pools.get(DB_NAME)
+        if pool is None:
+            pool = _pools[DB_NAME] = ConnectionPool(DB_NAME)
+        return pool
+
+@atexit.register
+def close_pools():
+    """Close every idle pooled connection (lets SQLite checkpoint the WAL)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
+
 def get_db_connection():
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """A pooled connection to DB_NAME; ``close()`` returns it to the pool."""
+    return _get_pool().acquire()
+
+# ==========================================
+# WRITER
+# ==========================================
+
+# Every write goes through one writer thread per database, which commits
+# whatever has queued up as a single transaction (group commit): one fsync
+# and one lock acquisition for many writes, none of them on the caller's
+# thread. Each write runs under its own savepoint, so a failing statement
+# (say a duplicate username) only fails that write.
+WRITE_QUEUE_SIZE = int(os.getenv("DB_WRITE_QUEUE", "10000"))
+WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH", "500"))
+WRITE_TIMEOUT = float(os.getenv("DB_WRITE_TIMEOUT", "10"))
+# A batch whose transaction can't start because another process holds the
+# lock past busy_timeout is retried this many times, with backoff
+WRITE_BUSY_RETRIES = int(os.getenv("DB_WRITE_BUSY_RETRIES", "5"))
+WRITE_BUSY_BACKOFF = 0.1
+
+WriteResult = namedtuple("WriteResult", ["rowcount", "lastrowid"])
+
+class WriteQueueFull(sqlite3.OperationalError):
+    """The write queue stayed full for longer than DB_WRITE_TIMEOUT."""
+
+class WriteTimeout(sqlite3.OperationalError):
+    """A write waited on by its caller wasn't committed within DB_WRITE_TIMEOUT."""
+
+def _is_busy(error):
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+class _Write:
+    __slots__ = ("statements", "future", "report_errors")
+    
+    def __init__(self, statements, report_errors=True):
+        # [(sql, params, many)]; None is a flush marker
+        self.statements = statements
+        self.future = Future()
+        self.report_errors = report_errors
+
+_STOP = object()
+
+class DatabaseWriter:
+    """
+    Single writer thread for one database file.
+    
+    ``submit()`` queues a write and returns a Future that resolves to a
+    WriteResult once the write is committed (or raises its error). The
+    queue is bounded: blocking submits wait for room (backpressure) and
+    non-blocking ones are dropped. ``close()`` commits everything queued
+    before stopping.
+    """
+    
+    def __init__(self, path, max_queue=WRITE_QUEUE_SIZE, batch_size=WRITE_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.commits = 0
+        self.writes = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+    
+    def submit(self, statements, block=True, timeout=WRITE_TIMEOUT, report_errors=True):
+        """
+        Queue ``statements`` (a list of (sql, params, many)) as one atomic
+        write. Returns its Future, or None if ``block`` is False and the
+        queue is full.
+        """
+        item = _Write(statements, report_errors)
+        try:
+            if block:
+                self._queue.put(item, timeout=timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            if not block:
+                self.dropped += 1
+                return None
+            raise WriteQueueFull(f"Database write queue full for {timeout:g}s")
+        return item.future
+    
+    def flush(self, timeout=WRITE_TIMEOUT):
+        """Wait until every write queued so far is committed. Returns False on timeout."""
+        try:
+            self.submit(None, timeout=timeout).result(timeout)
+            return True
+        except (WriteQueueFull, FutureTimeout):
+            return False
+    
+    def close(self, timeout=WRITE_TIMEOUT):
+        """Commit everything queued, then stop the thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+    
+    def _run(self):
+        conn = get_db_connection()
+        # Transactions are managed explicitly below
+        conn.isolation_level = None
+        try:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                batch = [item]
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                try:
+                    self._commit(conn, batch)
+                except Exception as e:
+                    # Never let one bad batch stop the thread or strand its callers
+                    print(f"Database writer batch failed: {e}")
+                    for item in batch:
+                        self._settle(item, None, e)
+        finally:
+            conn.isolation_level = ""
+            conn.close()
+    
+    def _commit(self, conn, batch):
+        for attempt in range(WRITE_BUSY_RETRIES + 1):
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                outcomes = [(item, *self._apply(conn, item)) for item in batch]
+                conn.execute('COMMIT')
+                break
+            except Exception as e:
+                # The writer thread must survive anything a write throws at it
+                self._rollback(conn)
+                if _is_busy(e) and attempt < WRITE_BUSY_RETRIES:
+                    time.sleep(WRITE_BUSY_BACKOFF * 2 ** attempt)
+                    continue
+                outcomes = [(item, None, e) for item in batch]
+                break
+        self.commits += 1
+        self.writes += len(batch)
+        for item, result, error in outcomes:
+            self._settle(item, result, error)
+    
+    @staticmethod
+    def _rollback(conn):
+        try:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+        except sqlite3.Error as e:
+            print(f"Database writer rollback failed: {e}")
+    
+    @staticmethod
+    def _settle(item, result, error):
+        if item.future.done():
+            return
+        if error is None:
+            item.future.set_result(result)
+        else:
+            if item.report_errors:
+                print(f"Database write failed: {error}")
+            item.future.set_exception(error)
+    
+    @staticmethod
+    def _apply(conn, item):
+        if item.statements is None:
+            return None, None
+        conn.execute('SAVEPOINT write')
+        try:
+            cursor = None
+            for sql, params, many in item.statements:
+                cursor = conn.executemany(sql, params) if many else conn.execute(sql, params)
+            conn.execute('RELEASE write')
+            return WriteResult(cursor.rowcount, cursor.lastrowid), None
+        except Exception as e:
+            conn.execute('ROLLBACK TO write')
+            conn.execute('RELEASE write')
+            return None, e
 
-def init_db():
-    """Initialize the database tables."""
+_db_writers = {}
+_db_writers_lock = threading.Lock()
+
+def get_writer():
+    """The writer thread for DB_NAME, started on first use."""
+    with _db_writers_lock:
+        writer = _db_writers.get(DB_NAME)
+        if writer is None:
+            writer = _db_writers[DB_NAME] = DatabaseWriter(DB_NAME)
+        return writer
+
+@atexit.register
+def close_writers():
+    """Drain and stop every writer thread (runs at exit, before the pools close)."""
+    with _db_writers_lock:
+        writers = list(_db_writers.values())
+        _db_writers.clear()
+    for writer in writers:
+        writer.close()
+
+def flush_writes(timeout=WRITE_TIMEOUT):
+    """Wait until every queued write is committed. Returns False on timeout."""
+    return get_writer().flush(timeout)
+
+def _write(statements, wait=False, block=True):
+    """
+    Queue one write (a statement or a list of them). With ``wait`` the
+    commit is awaited and its WriteResult returned (its error raised);
+    otherwise the Future is returned and errors are only logged.
+    """
+    if isinstance(statements, tuple):
+        statements = [statements]
+    future = get_writer().submit(statements, block=block, report_errors=not wait)
+    if not wait or future is None:
+        return future
+    try:
+        return future.result(WRITE_TIMEOUT)
+    except FutureTimeout:
+        raise WriteTimeout(f"Database write not committed within {WRITE_TIMEOUT:g}s") from None
+
+def _stmt(sql, params=()):
+    return (sql, params, False)
+
+def _many(sql, rows):
+    return (sql, rows, True)
+
+def _insert(table, columns, row, verb="INSERT"):
+    return _stmt(f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                 tuple(row.get(col) for col in columns))
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+def init_db(force=False):
+    """
+    Initialize the database tables.
+    
+    Runs the DDL once per database per process; later calls (every
+    Streamlit rerun) return immediately unless ``force`` is set.
+    """
+    with _init_lock:
+        if DB_NAME in _initialized and not force:
+            return
+        _create_tables()
+        _initialized.add(DB_NAME)
+
+def _create_tables():
     conn = get_db_connection()
     c = conn.cursor()
     
@@ -38,26 +393,228 @@ def init_db():
             FOREIGN KEY (user_id) REFERENCES users (id)
         )
     ''')
+    # Set when a transcript is (re)graded offline by batch_grade.py
+    _ensure_column(c, 'interviews', 'rubric_version', 'TEXT')
+    _ensure_column(c, 'interviews', 'graded_at', 'TIMESTAMP')
+    # Interviews saved from per-turn storage reference their session's turns
+    _ensure_column(c, 'interviews', 'session_id', 'TEXT')
+    c.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_interviews_session
+        ON interviews (session_id) WHERE session_id IS NOT NULL
+    ''')
+    # Covers the history listing: filter, order and projection without touching the table
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_interviews_user_time
+        ON interviews (user_id, timestamp, id, role, final_score, verdict)
+    ''')
+    
+    # LLM call metrics
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS llm_calls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            user_id INTEGER,
+            role TEXT,
+            model TEXT,
+            call_type TEXT NOT NULL,
+            queue_ms REAL,
+            ttft_ms REAL,
+            total_ms REAL,
+            prompt_tokens INTEGER,
+            cached_tokens INTEGER,
+            completion_tokens INTEGER,
+            parse_ok INTEGER,
+            error TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            provider TEXT
+        )
+    ''')
+    _ensure_column(c, 'llm_calls', 'provider', 'TEXT')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_llm_calls_role_model ON llm_calls (role, model)')
+    
+    # Extracted resume text, keyed by the uploaded file's SHA-256
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS resumes (
+            sha256 TEXT PRIMARY KEY,
+            text TEXT NOT NULL,
+            pages INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Each user's current resume
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS user_resumes (
+            user_id INTEGER PRIMARY KEY,
+            sha256 TEXT NOT NULL,
+            filename TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (sha256) REFERENCES resumes (sha256)
+        )
+    ''')
+    
+    # Interviews in progress, resumable until finished
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS interview_sessions (
+            session_id TEXT PRIMARY KEY,
+            user_id INTEGER,
+            role TEXT NOT NULL,
+            setup TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_interview_sessions_user
+        ON interview_sessions (user_id, status, updated_at)
+    ''')
+    
+    # One row per message, written as the interview goes
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS turns (
+            session_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            score REAL,
+            latency_ms REAL,
+            meta TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (session_id, seq)
+        ) WITHOUT ROWID
+    ''')
     
     conn.commit()
     conn.close()
 
+# ==========================================
+# CONVERSATION STORAGE
+# ==========================================
+
+# Transcripts are stored as a BLOB: one format version byte, then the
+# zlib-compressed JSON. Rows written before compression are plain JSON
+# TEXT and are still read (and migrated in the background).
+CONVERSATION_IN_TURNS = 0    # no payload: the transcript is the session's rows in turns
+CONVERSATION_ZLIB = 1        # zlib, no dictionary
+CONVERSATION_ZLIB_DICT = 2   # zlib with CONVERSATION_ZDICT as preset dictionary
+CONVERSATION_LEVEL = int(os.getenv("DB_CONVERSATION_LEVEL", "6"))
+
+# Preset dictionary: strings every transcript repeats. zlib favours the end
+# of the dictionary, so the most frequent strings come last. Never edit it:
+# rows written with it would no longer decompress. Add a new format version
+# with a new dictionary instead.
+CONVERSATION_ZDICT = (
+    'Thank you for your answer. Can you walk me through how you would design, '
+    'tell me about a time when, what trade-offs did you consider, how would you '
+    'handle, in production, performance, scalability, the team, the project, '
+    'I think, I would, we used, because, for example, experience with '
+    '"status": "finished", "verdict": "SELECTED", "verdict": "NOT SELECTED", '
+    '"prompt_tokens": , "completion_tokens": , "cached_tokens": 0, '
+    '"final_score": null, "verdict": null, "usage": null, "usage": {'
+    '"status": "ongoing", "score": null, "score": '
+    '}, {"role": "user", "content": "'
+    '"}, {"role": "assistant", "content": "'
+    '[{"role": "assistant", "content": "'
+).encode()
+
+def encode_conversation(messages):
+    """Serialize a message list for the interviews.conversation column."""
+    compressor = zlib.compressobj(CONVERSATION_LEVEL, zdict=CONVERSATION_ZDICT)
+    data = json.dumps(messages).encode()
+    return bytes([CONVERSATION_ZLIB_DICT]) + compressor.compress(data) + compressor.flush()
+
+def decode_conversation(value):
+    """Message list from a stored conversation in any format version (or legacy JSON text)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return json.loads(value)
+    version, payload = value[0], value[1:]
+    if version == CONVERSATION_IN_TURNS:
+        raise ValueError("Conversation is stored in turns; load it with load_turns()")
+    try:
+        if version == CONVERSATION_ZLIB:
+            return json.loads(zlib.decompress(payload))
+        if version == CONVERSATION_ZLIB_DICT:
+            decompressor = zlib.decompressobj(zdict=CONVERSATION_ZDICT)
+            return json.loads(decompressor.decompress(payload) + decompressor.flush())
+    except zlib.error as e:
+        raise ValueError(f"Corrupt conversation: {e}") from e
+    raise ValueError(f"Unknown conversation format version {version}")
+
+def migrate_conversations(batch_size=200, pause=0.05):
+    """
+    Compress every legacy plain-text conversation, a batch per transaction.
+    
+    Batches go through the writer and wait for their commit; the ``pause``
+    between them leaves room in each group commit for live writes. Returns
+    the number of rows converted. The file only shrinks on disk after a
+    VACUUM; until then SQLite reuses the freed pages.
+    """
+    migrated = 0
+    after_id = 0
+    while True:
+        conn = get_db_connection()
+        rows = conn.execute('''
+            SELECT id, conversation FROM interviews
+            WHERE id > ? AND typeof(conversation) = 'text'
+            ORDER BY id LIMIT ?
+        ''', (after_id, batch_size)).fetchall()
+        if not rows:
+            conn.close()
+            return migrated
+        updates = []
+        for row in rows:
+            try:
+                updates.append((encode_conversation(json.loads(row['conversation'])), row['id']))
+            except ValueError:
+                # Unparseable legacy text is left as it is
+                continue
+        conn.close()
+        # The typeof() guard skips rows rewritten since they were read
+        _write(_many(
+            "UPDATE interviews SET conversation = ? WHERE id = ? AND typeof(conversation) = 'text'",
+            updates
+        ), wait=True)
+        migrated += len(updates)
+        after_id = rows[-1]['id']
+        time.sleep(pause)
+
+_migration_started = set()
+
+def start_conversation_migration():
+    """Run migrate_conversations() on a daemon thread, once per database per process."""
+    with _init_lock:
+        if DB_NAME in _migration_started:
+            return
+        _migration_started.add(DB_NAME)
+    
+    def run():
+        try:
+            migrated = migrate_conversations()
+        except sqlite3.Error as e:
+            print(f"Conversation migration failed: {e}")
+            return
+        if migrated:
+            print(f"Compressed {migrated} stored conversations")
+    
+    threading.Thread(target=run, name="conversation-migration", daemon=True).start()
+
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 def create_user(username, password):
     """Create a new user. Returns True if successful, False if username exists."""
-    conn = get_db_connection()
-    c = conn.cursor()
     try:
-        c.execute('INSERT INTO users (username, password) VALUES (?, ?)', 
-                  (username, hash_password(password)))
-        conn.commit()
+        # Waits for the commit: the user logs in right after signing up
+        _write(_stmt('INSERT INTO users (username, password) VALUES (?, ?)',
+                     (username, hash_password(password))), wait=True)
         return True
     except sqlite3.IntegrityError:
         return False
-    finally:
-        conn.close()
 
 def verify_user(username, password):
     """Verify user credentials. Returns user ID if valid, None otherwise."""
@@ -70,23 +627,370 @@ def verify_user(username, password):
         return user['id']
     return None
 
-def save_interview(user_id, role, messages, final_score, verdict):
-    """Save a completed interview."""
+def save_interview(user_id, role, messages, final_score, verdict, session_id=None):
+    """
+    Save a completed interview.
+    
+    With ``session_id`` the transcript is already in the turns table: only
+    a reference is stored (``messages`` may be None), the session is marked
+    finished, and saving the same session twice is a no-op. The write is
+    queued behind the session's turns, so it never points at missing ones.
+    """
+    if session_id is None:
+        conversation = encode_conversation(messages)
+    else:
+        conversation = bytes([CONVERSATION_IN_TURNS])
+    statements = [_stmt('''
+        INSERT OR IGNORE INTO interviews (user_id, role, conversation, final_score, verdict, session_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (user_id, role, conversation, final_score, verdict, session_id))]
+    if session_id is not None:
+        statements.append(_stmt('''
+            UPDATE interview_sessions SET status = 'finished', updated_at = CURRENT_TIMESTAMP
+            WHERE session_id = ?
+        ''', (session_id,)))
+    _write(statements)
+
+INTERVIEW_SUMMARY_COLUMNS = ("id", "role", "final_score", "verdict", "timestamp")
+
+def get_user_interviews(user_id, before_timestamp=None, before_id=None, limit=50):
+    """
+    List a user's past interviews, newest first, without their transcripts.
+    
+    Returns dicts with id, role, final_score, verdict and timestamp, served
+    entirely from the (user_id, timestamp, id, ...) covering index. To get
+    the next page pass the last row's ``timestamp`` as ``before_timestamp``
+    and its ``id`` as ``before_id``. Use get_interview_conversation() for
+    one interview's transcript.
+    """
+    query = f'''
+        SELECT {', '.join(INTERVIEW_SUMMARY_COLUMNS)} FROM interviews
+        WHERE user_id = ?
+    '''
+    params = [user_id]
+    if before_timestamp is not None:
+        if before_id is None:
+            query += ' AND timestamp < ?'
+            params.append(before_timestamp)
+        else:
+            # Rows saved in the same second are ordered by id
+            query += ' AND (timestamp, id) < (?, ?)'
+            params += [before_timestamp, before_id]
+    query += ' ORDER BY timestamp DESC, id DESC LIMIT ?'
+    params.append(limit)
+    
     conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO interviews (user_id, role, conversation, final_score, verdict)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (user_id, role, json.dumps(messages), final_score, verdict))
-    conn.commit()
+    rows = conn.execute(query, params).fetchall()
     conn.close()
+    return [dict(row) for row in rows]
 
-def get_user_interviews(user_id):
-    """Get all past interviews for a user."""
+def get_interview_conversation(interview_id, user_id=None):
+    """
+    The message list of one stored interview, or None if it doesn't exist
+    (or, when ``user_id`` is given, belongs to someone else).
+    """
+    query = 'SELECT conversation, session_id FROM interviews WHERE id = ?'
+    params = [interview_id]
+    if user_id is not None:
+        query += ' AND user_id = ?'
+        params.append(user_id)
     conn = get_db_connection()
-    c = conn.cursor()
-    interviews = c.execute('''
-        SELECT * FROM interviews WHERE user_id = ? ORDER BY timestamp DESC
-    ''', (user_id,)).fetchall()
+    row = conn.execute(query, params).fetchone()
+    if row is not None and _in_turns(row['conversation']):
+        messages = _load_turns(conn, [row['session_id']]).get(row['session_id'], [])
+    else:
+        messages = decode_conversation(row['conversation']) if row else None
+    conn.close()
+    return messages
+
+def iter_interviews_for_grading(after_id=0, rubric_version=None, page_size=500):
+    """
+    Yield interviews as dicts (id, user_id, role, messages) in id order,
+    skipping ones already graded with ``rubric_version``. ``messages`` is
+    None when the stored transcript can't be read.
+    
+    Rows are read a page at a time with keyset pagination, so no read
+    transaction stays open while grades are written back.
+    """
+    while True:
+        conn = get_db_connection()
+        cursor = conn.execute('''
+            SELECT id, user_id, role, conversation, session_id FROM interviews
+            WHERE id > ? AND (rubric_version IS NOT ? OR ? IS NULL)
+            ORDER BY id LIMIT ?
+        ''', (after_id, rubric_version, rubric_version, page_size))
+        rows = cursor.fetchmany(page_size)
+        turns = _load_turns(conn, [row['session_id'] for row in rows if _in_turns(row['conversation'])])
+        conn.close()
+        if not rows:
+            return
+        for row in rows:
+            if _in_turns(row['conversation']):
+                messages = turns.get(row['session_id'], [])
+            else:
+                try:
+                    messages = decode_conversation(row['conversation'])
+                except ValueError:
+                    messages = None
+            yield {"id": row['id'], "user_id": row['user_id'], "role": row['role'], "messages": messages}
+        after_id = rows[-1]['id']
+
+def save_interview_grades(grades, rubric_version):
+    """
+    Write back (interview_id, final_score, verdict) tuples in one transaction,
+    returning once they are committed (the grader checkpoints after this).
+    """
+    _write(_many('''
+        UPDATE interviews
+        SET final_score = ?, verdict = ?, rubric_version = ?, graded_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    ''', [(score, verdict, rubric_version, interview_id) for interview_id, score, verdict in grades]), wait=True)
+
+# ==========================================
+# TURNS
+# ==========================================
+
+TURN_COLUMNS = ("session_id", "seq", "role", "content", "score", "latency_ms", "meta")
+
+def _in_turns(conversation):
+    return isinstance(conversation, bytes) and conversation[:1] == bytes([CONVERSATION_IN_TURNS])
+
+def _load_turns(conn, session_ids):
+    """Message lists for several sessions, keyed by session id."""
+    session_ids = list(dict.fromkeys(session_ids))
+    transcripts = {}
+    # Stay well under SQLite's bound-parameter limit
+    for start in range(0, len(session_ids), 500):
+        chunk = session_ids[start:start + 500]
+        rows = conn.execute(f'''
+            SELECT session_id, role, content, score, meta FROM turns
+            WHERE session_id IN ({', '.join('?' for _ in chunk)})
+            ORDER BY session_id, seq
+        ''', chunk).fetchall()
+        for row in rows:
+            message = {"role": row['role'], "content": row['content']}
+            if row['role'] == 'assistant':
+                message["score"] = row['score']
+            if row['meta']:
+                message.update(json.loads(row['meta']))
+            transcripts.setdefault(row['session_id'], []).append(message)
+    return transcripts
+
+def start_interview_session(session_id, user_id, role, setup):
+    """Register an interview in progress with its setup (the interview_data dict)."""
+    _write(_stmt('''
+        INSERT OR IGNORE INTO interview_sessions (session_id, user_id, role, setup)
+        VALUES (?, ?, ?, ?)
+    ''', (session_id, user_id, role, json.dumps(setup))))
+
+def set_interview_status(session_id, status):
+    """Mark a session 'active' or 'paused' ('finished' is set by save_interview)."""
+    _write(_stmt('''
+        UPDATE interview_sessions SET status = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE session_id = ?
+    ''', (status, session_id)))
+
+def record_turn(session_id, seq, message, latency_ms=None):
+    """
+    Persist one message of an interview in progress without blocking.
+    
+    ``seq`` is the message's position in the transcript; writing the same
+    position again replaces it. Fields other than role, content and score
+    are kept as JSON.
+    """
+    meta = {k: v for k, v in message.items() if k not in ("role", "content", "score") and v is not None}
+    # OR REPLACE: re-recording a transcript position overwrites it
+    _write(_insert("turns", TURN_COLUMNS, {
+        "session_id": session_id,
+        "seq": seq,
+        "role": message["role"],
+        "content": message.get("content") or "",
+        "score": message.get("score"),
+        "latency_ms": latency_ms,
+        "meta": json.dumps(meta) if meta else None,
+    }, verb="INSERT OR REPLACE"))
+
+def load_turns(session_id):
+    """The transcript of one session, rebuilt from its turns."""
+    conn = get_db_connection()
+    messages = _load_turns(conn, [session_id]).get(session_id, [])
+    conn.close()
+    return messages
+
+# A longer gap between two turns is a pause, and counts only this long
+IDLE_GAP_SECONDS = 600
+
+def get_interview_duration(session_id):
+    """
+    Seconds spent in an interview according to its turn timestamps, with
+    each gap capped at IDLE_GAP_SECONDS. None with fewer than two turns.
+    """
+    conn = get_db_connection()
+    rows = conn.execute(
+        'SELECT julianday(created_at) * 86400 AS ts FROM turns WHERE session_id = ? ORDER BY seq',
+        (session_id,)
+    ).fetchall()
+    conn.close()
+    stamps = [row['ts'] for row in rows if row['ts'] is not None]
+    if len(stamps) < 2:
+        return None
+    return sum(min(max(b - a, 0.0), IDLE_GAP_SECONDS) for a, b in zip(stamps, stamps[1:]))
+
+def get_resumable_interviews(user_id, limit=5):
+    """
+    A user's unfinished interviews (paused, or interrupted by a crash or a
+    closed tab) that have at least one turn, most recently active first.
+    """
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT s.session_id, s.role, s.status, s.setup,
+               COUNT(t.seq) AS turns, COALESCE(SUM(t.role = 'user'), 0) AS answers,
+               MAX(COALESCE(MAX(t.created_at), s.updated_at), s.updated_at) AS last_active
+        FROM interview_sessions s LEFT JOIN turns t ON t.session_id = s.session_id
+        WHERE s.user_id = ? AND s.status != 'finished'
+        GROUP BY s.session_id
+        HAVING COUNT(t.seq) > 0
+        ORDER BY last_active DESC
+        LIMIT ?
+    ''', (user_id, limit)).fetchall()
+    conn.close()
+    return [{**dict(row), "setup": json.loads(row['setup'])} for row in rows]
+
+def load_interview_session(session_id, user_id=None):
+    """Setup, status and transcript of a stored session, or None."""
+    query = 'SELECT session_id, role, status, setup FROM interview_sessions WHERE session_id = ?'
+    params = [session_id]
+    if user_id is not None:
+        query += ' AND user_id = ?'
+        params.append(user_id)
+    conn = get_db_connection()
+    row = conn.execute(query, params).fetchone()
+    messages = _load_turns(conn, [session_id]).get(session_id, []) if row else None
+    conn.close()
+    if row is None:
+        return None
+    return {**dict(row), "setup": json.loads(row['setup']), "messages": messages}
+
+# ==========================================
+# RESUMES
+# ==========================================
+
+def get_cached_resume(sha256):
+    """Return the cached extraction for a resume file hash, or None."""
+    conn = get_db_connection()
+    row = conn.execute('SELECT text, pages FROM resumes WHERE sha256 = ?', (sha256,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def cache_resume(sha256, text, pages):
+    """Store the normalized text extracted from a resume file."""
+    _write(_stmt('INSERT OR REPLACE INTO resumes (sha256, text, pages) VALUES (?, ?, ?)',
+                 (sha256, text, pages)))
+
+def set_user_resume(user_id, sha256, filename=None):
+    """Make an extracted resume the user's current one."""
+    _write(_stmt('''
+        INSERT INTO user_resumes (user_id, sha256, filename, updated_at)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (user_id) DO UPDATE SET
+            sha256 = excluded.sha256, filename = excluded.filename, updated_at = excluded.updated_at
+    ''', (user_id, sha256, filename)))
+
+def get_user_resume(user_id):
+    """Return the user's current resume (text, pages, filename), or None."""
+    conn = get_db_connection()
+    row = conn.execute('''
+        SELECT r.text, r.pages, u.filename, u.sha256
+        FROM user_resumes u JOIN resumes r ON r.sha256 = u.sha256
+        WHERE u.user_id = ?
+    ''', (user_id,)).fetchone()
     conn.close()
-    return interviews
+    return dict(row) if row else None
+
+# ==========================================
+# LLM CALL METRICS
+# ==========================================
+
+LLM_CALL_COLUMNS = (
+    "session_id", "user_id", "role", "model", "call_type", "queue_ms", "ttft_ms",
+    "total_ms", "prompt_tokens", "cached_tokens", "completion_tokens", "parse_ok", "error", "provider"
+)
+
+def record_llm_call(**row):
+    """Record one LLM call's latency/token metrics without blocking (dropped if the write queue is full)."""
+    _write(_insert("llm_calls", LLM_CALL_COLUMNS, row), block=False)
+
+def _percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+def get_llm_latency_stats(role=None, model=None, since=None, call_type=None):
+    """
+    Latency percentiles and token usage grouped by role, provider and model
+    (the backend that actually served each call).
+    
+    ``call_type`` restricts the stats to one route (e.g. "followup" or
+    "verdict").
+    
+    Returns a list of dicts with call counts, p50/p95/p99 total and
+    time-to-first-token latency (ms), parse success rate and average tokens
+    per interview (session). Calls outside any interview, such as opening
+    cache top-ups, count towards latency but not tokens per interview.
+    """
+    query = '''
+        SELECT role, provider, model, session_id, total_ms, ttft_ms, parse_ok,
+               COALESCE(prompt_tokens, 0) + COALESCE(completion_tokens, 0) AS tokens
+        FROM llm_calls WHERE 1 = 1
+    '''
+    params = []
+    if role is not None:
+        query += ' AND role = ?'
+        params.append(role)
+    if model is not None:
+        query += ' AND model = ?'
+        params.append(model)
+    if since is not None:
+        query += ' AND timestamp >= ?'
+        params.append(since)
+    if call_type is not None:
+        query += ' AND call_type = ?'
+        params.append(call_type)
+    
+    conn = get_db_connection()
+    rows = conn.execute(query, params).fetchall()
+    conn.close()
+    
+    groups = {}
+    for row in rows:
+        group = groups.setdefault((row['role'], row['provider'], row['model']), {
+            "calls": 0, "total": [], "ttft": [], "parsed": 0, "sessions": {}
+        })
+        group["calls"] += 1
+        if row['total_ms'] is not None:
+            group["total"].append(row['total_ms'])
+        if row['ttft_ms'] is not None:
+            group["ttft"].append(row['ttft_ms'])
+        group["parsed"] += 1 if row['parse_ok'] else 0
+        if row['session_id'] is not None:
+            sessions = group["sessions"]
+            sessions[row['session_id']] = sessions.get(row['session_id'], 0) + row['tokens']
+    
+    stats = []
+    for (group_role, group_provider, group_model), group in sorted(groups.items(), key=lambda item: str(item[0])):
+        stats.append({
+            "role": group_role,
+            "provider": group_provider,
+            "model": group_model,
+            "calls": group["calls"],
+            "p50_ms": _percentile(group["total"], 50),
+            "p95_ms": _percentile(group["total"], 95),
+            "p99_ms": _percentile(group["total"], 99),
+            "ttft_p50_ms": _percentile(group["ttft"], 50),
+            "ttft_p95_ms": _percentile(group["ttft"], 95),
+            "parse_success_rate": group["parsed"] / group["calls"],
+            "tokens_per_interview": (sum(group["sessions"].values()) / len(group["sessions"])
+                                     if group["sessions"] else None),
+        })
+    return stats
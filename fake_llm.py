@@ -0,0 +1,229 @@
+"""
+Local simulated chat model for offline load and latency testing.
+
+Set LLM_BACKEND=fake and every chain the coach builds runs against
+FakeChatModel instead of the OpenAI API. Replies are schema-valid for the
+prompt they answer (interviewer turns, answer grades, question-bank
+batches, transcript grades, summary notes) and deterministic for a given
+prompt and seed, while latency, streaming speed and failures follow the
+configured distributions:
+
+    FAKE_LLM_LATENCY=lognormal:800,0.5   # time to first token: mean ms, sigma
+    FAKE_LLM_LATENCY=uniform:200,1500    # or fixed:500
+    FAKE_LLM_TOKENS_PER_SEC=60           # streaming rate after the first token
+    FAKE_LLM_ERROR_RATE=0.02             # fraction of calls that fail
+    FAKE_LLM_ERRORS=timeout,rate_limit,server
+    FAKE_LLM_SEED=0
+"""
+
+import os
+import re
+import json
+import math
+import time
+import random
+import asyncio
+import hashlib
+from typing import Any, List, Optional
+from pydantic import PrivateAttr
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from history import count_tokens
+
+QUESTIONS = [
+    "Walk me through a recent project you're proud of. What was your role and what trade-offs did you make?",
+    "How would you design a rate limiter for a public API? Consider multiple servers.",
+    "Tell me about a production incident you handled. How did you find the root cause?",
+    "How do you decide between a relational database and a document store for a new service?",
+    "Explain how you would make a slow endpoint faster. Where would you start measuring?",
+    "How do you keep a large codebase maintainable as the team grows?",
+    "Describe how you would test a feature that depends on an unreliable third-party service.",
+]
+
+
+# The coach states each answer's number ("(Answer 3 of 5.)"), as it does
+# for the real model, so the count survives history summarization
+_ANSWER_NUMBER = re.compile(r"^\(Answer (\d+) of (\d+)\b")
+
+
+class FakeAPIError(Exception):
+    """Injected provider failure; ``status_code`` makes it look like an HTTP error."""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _parse_latency(spec):
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()]
+    if kind == "fixed":
+        return lambda rng: values[0] / 1000
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal":
+        mean_ms, sigma = values[0], values[1] if len(values) > 1 else 0.5
+        # Parameterized so the distribution's mean is mean_ms
+        mu = math.log(mean_ms) - sigma ** 2 / 2
+        return lambda rng: rng.lognormvariate(mu, sigma) / 1000
+    raise ValueError(f"Unknown FAKE_LLM_LATENCY distribution: {spec}")
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that simulates an LLM provider locally."""
+
+    model_name: str = "fake"
+    latency: str = "lognormal:800,0.5"
+    tokens_per_sec: float = 60.0
+    error_rate: float = 0.0
+    errors: str = "timeout,rate_limit,server"
+    seed: int = 0
+    _events: Optional[random.Random] = PrivateAttr(default=None)
+
+    @classmethod
+    def from_env(cls, model="fake"):
+        return cls(
+            model_name=model,
+            latency=os.getenv("FAKE_LLM_LATENCY", "lognormal:800,0.5"),
+            tokens_per_sec=float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "60")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            errors=os.getenv("FAKE_LLM_ERRORS", "timeout,rate_limit,server"),
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+        )
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    # -- reply content -------------------------------------------------
+
+    def _rng(self, prompt):
+        """Content RNG: the same prompt always gets the same reply."""
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode()).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _reply(self, messages, rng):
+        prompt = "\n".join(str(m.content) for m in messages)
+        if '{"questions"' in prompt:
+            count = 10
+            return json.dumps({"questions": [
+                f"{rng.choice(QUESTIONS)} (variant {i + 1})" for i in range(count)
+            ]})
+        if "grading one answer" in prompt:
+            return json.dumps({
+                "score": round(rng.uniform(4, 9.5), 1),
+                "strengths": [rng.choice(["Clear structure", "Concrete example", "Good depth on trade-offs"])],
+                "improvements": [rng.choice(["Quantify the impact", "Discuss failure modes", "Be more concise"])],
+                "summary": "A reasonable answer with room for more specifics."
+            })
+        if "reviewing the full transcript" in prompt:
+            score = round(rng.uniform(3, 9.5), 1)
+            return json.dumps({"final_score": score, "verdict": "SELECTED" if score >= 6 else "NOT SELECTED"})
+        if "running notes" in prompt:
+            return f"The candidate gave {prompt.count('Candidate:')} more answers, mostly with concrete examples."
+        return self._interviewer_reply(messages, rng)
+
+    def _interviewer_reply(self, messages, rng):
+        numbered = _ANSWER_NUMBER.match(str(messages[-1].content)) if messages else None
+        if numbered:
+            answers, total = int(numbered.group(1)), int(numbered.group(2))
+        else:
+            # No stated number: count the answers still in the history
+            answers, total = sum(
+                1 for m in messages
+                if isinstance(m, HumanMessage) and not str(m.content).startswith("(The candidate has joined")
+            ), 5
+        if answers >= total:
+            score = round(rng.uniform(4, 9.5), 1)
+            return json.dumps({
+                "message": "Thank you, that concludes the interview. You showed solid fundamentals.",
+                "status": "finished",
+                "score": round(rng.uniform(4, 9.5), 1),
+                "final_score": score,
+                "verdict": "SELECTED" if score >= 6 else "NOT SELECTED"
+            })
+        lead = "Hello! Let's get started." if answers == 0 else rng.choice(["Thanks.", "Good.", "Interesting."])
+        return json.dumps({
+            "message": f"{lead} {rng.choice(QUESTIONS)}",
+            "status": "ongoing",
+            "score": None if answers == 0 else round(rng.uniform(4, 9.5), 1),
+            "final_score": None,
+            "verdict": None
+        })
+
+    # -- timing and failures -------------------------------------------
+
+    def _plan(self, messages):
+        """Reply text, first-token delay, per-token delay and any injected error."""
+        prompt = "\n".join(str(m.content) for m in messages)
+        text = self._reply(messages, self._rng(prompt))
+        # Timing and failures come from one seeded stream per model, so a
+        # run is repeatable but a retried prompt doesn't fail identically
+        if self._events is None:
+            self._events = random.Random(self.seed)
+        rng = self._events
+        error = None
+        if self.error_rate and rng.random() < self.error_rate:
+            kind = rng.choice([e.strip() for e in self.errors.split(",") if e.strip()])
+            error = {
+                "timeout": TimeoutError("Simulated provider timeout"),
+                "rate_limit": FakeAPIError("Simulated rate limit", 429),
+                "server": FakeAPIError("Simulated server error", 500),
+            }.get(kind, FakeAPIError(f"Simulated {kind} error", 500))
+        ttft = _parse_latency(self.latency)(rng)
+        per_token = 1.0 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+        usage = {
+            "input_tokens": count_tokens(prompt),
+            "output_tokens": count_tokens(text),
+        }
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return text, ttft, per_token, error, usage
+
+    @staticmethod
+    def _pieces(text):
+        # Roughly one token per piece: split after every 4 characters
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    def _result(self, text, usage):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=usage))])
+
+    # -- BaseChatModel interface ---------------------------------------
+
+    def _generate(self, messages: List[Any], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text, ttft, per_token, error, usage = self._plan(messages)
+        time.sleep(ttft + per_token * len(self._pieces(text)))
+        if error is not None:
+            raise error
+        return self._result(text, usage)
+
+    async def _agenerate(self, messages: List[Any], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text, ttft, per_token, error, usage = self._plan(messages)
+        await asyncio.sleep(ttft + per_token * len(self._pieces(text)))
+        if error is not None:
+            raise error
+        return self._result(text, usage)
+
+    def _stream(self, messages: List[Any], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any):
+        text, ttft, per_token, error, usage = self._plan(messages)
+        time.sleep(ttft)
+        if error is not None:
+            raise error
+        for piece in self._pieces(text):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            time.sleep(per_token)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+    async def _astream(self, messages: List[Any], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any):
+        text, ttft, per_token, error, usage = self._plan(messages)
+        await asyncio.sleep(ttft)
+        if error is not None:
+            raise error
+        for piece in self._pieces(text):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            await asyncio.sleep(per_token)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
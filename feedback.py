@@ -0,0 +1,175 @@
+"""
+Per-answer feedback.
+
+Each submitted answer is graded in the background on the shared LLM pool's
+background lane while the interview carries on, so by the time the
+candidate reaches the Results page the report only has to be assembled
+from evaluations that already exist.
+"""
+
+import threading
+from llm_runtime import get_pool, PoolBusyError
+from json_stream import parse_json_block
+
+MAX_REPORT_POINTS = 5
+
+
+def _clamp_score(value):
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    return min(max(score, 0.0), 10.0)
+
+
+def _as_list(value):
+    if isinstance(value, str):
+        value = [value]
+    return [str(item).strip() for item in value or [] if str(item).strip()]
+
+
+def normalize_evaluation(text):
+    """Parse a grader reply into {score, strengths, improvements, summary}."""
+    data = parse_json_block(text or "")
+    if not isinstance(data, dict):
+        return {"score": None, "strengths": [], "improvements": [], "summary": (text or "").strip(),
+                "error": "grader reply was not valid JSON"}
+    return {
+        "score": _clamp_score(data.get("score")),
+        "strengths": _as_list(data.get("strengths")),
+        "improvements": _as_list(data.get("improvements")),
+        "summary": str(data.get("summary") or "").strip(),
+    }
+
+
+def answer_pairs(messages):
+    """(question, answer) for each candidate answer in a transcript, in order."""
+    pairs = []
+    question = ""
+    for message in messages:
+        if message["role"] == "assistant":
+            question = message["content"]
+        elif message["role"] == "user":
+            pairs.append((question, message["content"]))
+    return pairs
+
+
+class AnswerEvaluations:
+    """Background evaluations for one interview's answers."""
+
+    def __init__(self, session_id=None):
+        self.session_id = session_id
+        self._items = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def _start(self, coach, item, interview_data, timeout, route="answer_score"):
+        try:
+            return get_pool().submit(
+                lambda: coach.aevaluate_answer(item["question"], item["answer"], interview_data, route),
+                timeout=timeout,
+                lane="background",
+                user=interview_data.get("user_id")
+            )
+        except PoolBusyError:
+            return None
+
+    def ensure(self, coach, messages, interview_data):
+        """Queue an evaluation for every answer in ``messages`` that doesn't have one yet."""
+        with self._lock:
+            for question, answer in answer_pairs(messages)[len(self._items):]:
+                item = {"number": len(self._items) + 1, "question": question, "answer": answer, "result": None}
+                # Never block a turn on grading; collect() retries anything not queued
+                item["future"] = self._start(coach, item, interview_data, timeout=0)
+                self._items.append(item)
+
+    def collect(self, coach, interview_data):
+        """Wait for every evaluation and return them in answer order."""
+        with self._lock:
+            items = list(self._items)
+        for item in items:
+            if item["future"] is None and item["result"] is None:
+                # The Results page is waiting on these: use the report route
+                item["future"] = self._start(coach, item, interview_data, timeout=None, route="report")
+        for item in items:
+            if item["result"] is not None:
+                continue
+            try:
+                if item["future"] is None:
+                    raise PoolBusyError("LLM pool saturated")
+                item["result"] = item["future"].result()
+            except Exception as e:
+                item["result"] = {"score": None, "strengths": [], "improvements": [], "summary": "", "error": str(e)}
+        return [
+            {"number": item["number"], "question": item["question"], "answer": item["answer"], **item["result"]}
+            for item in items
+        ]
+
+
+def _top_points(answers, key):
+    points = []
+    seen = set()
+    for answer in answers:
+        for point in answer.get(key, []):
+            if point.casefold() not in seen:
+                seen.add(point.casefold())
+                points.append(point)
+    return points[:MAX_REPORT_POINTS]
+
+
+def build_report(answers, interview_data, final=None):
+    """
+    Assemble the interview report from per-answer evaluations.
+
+    ``final`` is the interviewer's closing reply (if the interview finished),
+    used for the verdict. Scores are 0-10 per answer and 0-100 overall.
+    """
+    final = final or {}
+    scored = [a["score"] for a in answers if a.get("score") is not None]
+    average = sum(scored) / len(scored) if scored else None
+    overall = round(average * 10) if average is not None else None
+    if final.get("final_score") is not None:
+        # The interviewer's own 1-10 overall rating takes precedence
+        overall = round(min(max(final["final_score"], 0), 10) * 10)
+
+    report = {
+        "job_title": interview_data.get("job_title", ""),
+        "company": interview_data.get("company", ""),
+        "level": interview_data.get("level", ""),
+        "answers": answers,
+        "answered": len(answers),
+        "scored": len(scored),
+        "average_score": average,
+        "overall_score": overall,
+        "verdict": final.get("verdict"),
+        "strengths": _top_points(answers, "strengths"),
+        "improvements": _top_points(answers, "improvements"),
+    }
+    report["text"] = report_text(report)
+    return report
+
+
+def report_text(report):
+    """Plain-text version of the report for download."""
+    rule = "=" * 50
+    overall = f"{report['overall_score']}/100" if report["overall_score"] is not None else "Not scored"
+    lines = [
+        "INTERVIEW PERFORMANCE REPORT", rule, "",
+        f"Position: {report['job_title'] or 'N/A'}",
+        f"Company: {report['company'] or 'N/A'}",
+        f"Level: {report['level'] or 'N/A'}",
+        "", "PERFORMANCE METRICS", rule,
+        f"Overall Score: {overall}",
+        f"Questions Answered: {report['answered']}",
+    ]
+    if report["verdict"]:
+        lines.append(f"Verdict: {report['verdict']}")
+    lines += ["", "PER-ANSWER BREAKDOWN", rule]
+    for answer in report["answers"]:
+        score = f"{answer['score']:g}/10" if answer.get("score") is not None else "not scored"
+        lines.append(f"Q{answer['number']} ({score}): {answer.get('summary') or ''}".rstrip())
+    lines += ["", "STRENGTHS", rule] + [f"✓ {point}" for point in report["strengths"]]
+    lines += ["", "AREAS FOR IMPROVEMENT", rule] + [f"• {point}" for point in report["improvements"]]
+    return "\n".join(lines)
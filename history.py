@@ -0,0 +1,133 @@
+"""
+Token-budgeted interview history.
+
+Keeps the last few turns verbatim and folds older ones into a running
+summary, so the prompt stops growing with every answer. Summaries are
+computed on the shared LLM pool after each turn, off the script thread.
+"""
+
+import os
+import threading
+from llm_runtime import get_pool, PoolBusyError
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _ENCODING = None
+
+SUMMARY_PREFIX = "Summary of the earlier interview turns:\n"
+SUMMARY_TOKEN_ALLOWANCE = 400   # instructions plus the generated notes
+
+
+def count_tokens(text):
+    """Token count for text, approximated as 4 chars/token without tiktoken."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+class InterviewHistory:
+    """
+    Interview transcript that fits a per-turn prompt token budget.
+
+    ``summarize`` is a coroutine function ``(summary, messages) -> str``
+    (e.g. InterviewCoach.asummarize_history) used to fold older turns.
+    """
+
+    def __init__(self, summarize, keep_turns=None, token_budget=None):
+        self.summarize = summarize
+        self.keep_turns = keep_turns or int(os.getenv("HISTORY_KEEP_TURNS", "2"))
+        self.token_budget = token_budget or int(os.getenv("HISTORY_TOKEN_BUDGET", "1500"))
+        self.summary = ""
+        self.summary_tokens = 0
+        self._messages = []
+        self._summarized = 0        # messages already folded into the summary
+        self._verbatim_tokens = 0   # tokens of the messages not yet folded
+        self._pending = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._messages)
+
+    @property
+    def verbatim_tokens(self):
+        return self._verbatim_tokens
+
+    def append(self, role, content):
+        """Record one message and schedule a summary update if needed."""
+        tokens = count_tokens(content)
+        with self._lock:
+            self._messages.append({"role": role, "content": content, "tokens": tokens})
+            self._verbatim_tokens += tokens
+            self._schedule_fold()
+
+    def _fold_cutoff(self):
+        # Everything before the last N turns, plus more while still over budget
+        cutoff = max(len(self._messages) - 2 * self.keep_turns, self._summarized)
+        tokens = sum(m["tokens"] for m in self._messages[cutoff:])
+        while cutoff < len(self._messages) - 1 and tokens + self.summary_tokens > self.token_budget:
+            tokens -= self._messages[cutoff]["tokens"]
+            cutoff += 1
+        return cutoff
+
+    def _schedule_fold(self):
+        # Caller holds the lock. One summary runs at a time; when it lands
+        # the next one is scheduled if more turns have aged out meanwhile.
+        if self._pending is not None:
+            return
+        cutoff = self._fold_cutoff()
+        if cutoff <= self._summarized:
+            return
+
+        batch = self._messages[self._summarized:cutoff]
+        previous = self.summary
+        try:
+            # Never wait for a slot: this runs on the script thread or, from
+            # _fold_done, on the pool's own loop. A skipped fold is retried
+            # on the next append; prompt_history still enforces the budget.
+            self._pending = get_pool().submit(
+                lambda: self.summarize(previous, batch),
+                timeout=0,
+                lane="background",
+                tokens=self.summary_tokens + sum(m["tokens"] for m in batch) + SUMMARY_TOKEN_ALLOWANCE
+            )
+        except PoolBusyError:
+            return
+        self._pending.add_done_callback(lambda future: self._fold_done(future, cutoff, batch))
+
+    def _fold_done(self, future, cutoff, batch):
+        with self._lock:
+            self._pending = None
+            try:
+                summary = future.result()
+            except Exception as e:
+                # Keep the turns verbatim; prompt_history still enforces the cap
+                print(f"History summary failed: {e}")
+                return
+            self.summary = summary.strip()
+            self.summary_tokens = count_tokens(self.summary)
+            self._summarized = cutoff
+            self._verbatim_tokens -= sum(m["tokens"] for m in batch)
+            self._schedule_fold()
+
+    def prompt_history(self):
+        """
+        Messages to send for the next turn: the running summary (as a system
+        note) followed by the most recent turns, within the token budget.
+        """
+        with self._lock:
+            recent = self._messages[self._summarized:]
+            used = self.summary_tokens + self._verbatim_tokens
+            # The summary may still be in flight: drop the oldest verbatim turns
+            while len(recent) > 1 and used > self.token_budget:
+                used -= recent[0]["tokens"]
+                recent = recent[1:]
+
+            history = []
+            if self.summary:
+                history.append({"role": "system", "content": SUMMARY_PREFIX + self.summary})
+            history.extend({"role": m["role"], "content": m["content"]} for m in recent)
+            return history
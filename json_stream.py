@@ -0,0 +1,325 @@
+"""
+Incremental, tolerant parser for the interviewer's JSON replies.
+
+Models regularly wrap the object in code fences or prose, leave trailing
+commas, put raw newlines inside strings, or get cut off mid-reply. This
+parser consumes the reply chunk by chunk, exposes each top-level field as
+soon as it is complete (and the "message" text while it is still arriving),
+and repairs what it can when the stream ends instead of giving up.
+"""
+
+import re
+import json
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+_CLOSERS = {'{': '}', '[': ']'}
+
+
+def _parse_scalar(raw):
+    """Parse a bare JSON value, accepting Python-style literals and quoted numbers."""
+    raw = raw.strip()
+    lowered = raw.lower()
+    if lowered in ("null", "none", ""):
+        return None
+    if lowered == "true":
+        return True
+    if lowered == "false":
+        return False
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def _parse_nested(raw):
+    """Parse a nested object/array, closing it and dropping trailing commas if needed."""
+    stack = []
+    in_string = escape = False
+    for ch in raw:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+        elif ch in '}]' and stack:
+            stack.pop()
+    if in_string:
+        raw += '"'
+    raw = _TRAILING_COMMA.sub(r'\1', raw.rstrip().rstrip(',') + "".join(reversed(stack)))
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+def _as_score(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.search(str(value))
+    return float(match.group()) if match else None
+
+
+def normalize_response(data):
+    """Coerce a parsed reply onto the interviewer schema."""
+    data = dict(data)
+    message = data.get("message")
+    data["message"] = "" if message is None else str(message)
+
+    status = str(data.get("status") or "ongoing").strip().lower()
+    data["status"] = "finished" if status == "finished" else "ongoing"
+
+    data["score"] = _as_score(data.get("score"))
+    if "final_score" in data:
+        data["final_score"] = _as_score(data.get("final_score"))
+
+    verdict = data.get("verdict")
+    if verdict is not None:
+        verdict = str(verdict).strip().upper().replace("_", " ")
+        data["verdict"] = verdict if verdict in ("SELECTED", "NOT SELECTED") else None
+    return data
+
+
+class InterviewResponseParser:
+    """
+    Streaming parser for one interviewer reply.
+
+    Call ``feed`` with each chunk (it returns any new "message" text), read
+    completed fields from ``fields`` as they appear, then call ``finish``
+    for the repaired, schema-normalized response dict.
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self.message = ""
+        self._raw = []
+        self._state = "prefix"
+        self._key = None
+        self._buf = []
+        self._escape = None     # pending escape sequence inside a string
+        self._pending_high = None
+        self._depth = 0
+        self._nested_string = False
+        self._nested_escape = False
+
+    @property
+    def complete(self):
+        """True once the top-level object has been closed."""
+        return self._state == "done"
+
+    def feed(self, chunk):
+        """Consume a chunk of model output; returns newly decoded message text."""
+        if not chunk:
+            return ""
+        self._raw.append(chunk)
+        before = len(self.message)
+        for ch in chunk:
+            if self._state == "done":
+                break
+            self._step(ch)
+        return self.message[before:]
+
+    # -- state machine -------------------------------------------------
+
+    def _step(self, ch):
+        state = self._state
+        if state == "prefix":
+            # Skip code fences and any prose before the object
+            if ch == '{':
+                self._state = "key"
+        elif state == "key":
+            if ch == '"':
+                self._state = "in_key"
+                self._buf = []
+            elif ch == '}':
+                self._state = "done"
+            elif ch.isalpha() or ch == '_':
+                # Unquoted key
+                self._state = "bare_key"
+                self._buf = [ch]
+        elif state in ("in_key", "in_string"):
+            self._string_char(ch)
+        elif state == "bare_key":
+            if ch == ':':
+                self._key = "".join(self._buf).strip()
+                self._state = "value"
+            else:
+                self._buf.append(ch)
+        elif state == "colon":
+            if ch == ':':
+                self._state = "value"
+        elif state == "value":
+            if ch.isspace():
+                return
+            self._buf = []
+            if ch == '"':
+                self._state = "in_string"
+                if self._key == "message":
+                    self.message = ""
+            elif ch in '{[':
+                self._state = "nested"
+                self._buf = [ch]
+                self._depth = 1
+                self._nested_string = self._nested_escape = False
+            else:
+                self._state = "scalar"
+                self._buf = [ch]
+        elif state == "scalar":
+            if ch in ',}\n':
+                self._set_field(_parse_scalar("".join(self._buf)))
+                self._state = "done" if ch == '}' else "key"
+            else:
+                self._buf.append(ch)
+        elif state == "nested":
+            self._nested_char(ch)
+        elif state == "after_value":
+            if ch == ',':
+                self._state = "key"
+            elif ch == '}':
+                self._state = "done"
+            elif ch == '"':
+                # Missing comma between fields
+                self._state = "in_key"
+                self._buf = []
+
+    def _string_char(self, ch):
+        if self._escape is not None:
+            self._escape += ch
+            if self._escape[0] == 'u' and len(self._escape) < 5:
+                return
+            self._decode_escape(self._escape)
+            self._escape = None
+        elif ch == '\\':
+            self._escape = ""
+        elif ch == '"':
+            self._end_string()
+        else:
+            self._emit(ch)
+
+    def _decode_escape(self, seq):
+        if seq[0] != 'u':
+            self._emit(_ESCAPES.get(seq, seq))
+            return
+        try:
+            code = int(seq[1:], 16)
+        except ValueError:
+            self._emit('\ufffd')
+            return
+        if 0xD800 <= code < 0xDC00:
+            self._pending_high = code
+            return
+        if 0xDC00 <= code < 0xE000 and self._pending_high is not None:
+            code = 0x10000 + ((self._pending_high - 0xD800) << 10) + (code - 0xDC00)
+        self._pending_high = None
+        self._emit(chr(code))
+
+    def _emit(self, ch):
+        if self._pending_high is not None:
+            # Lone high surrogate
+            self._pending_high = None
+            self._emit('\ufffd')
+        self._buf.append(ch)
+        if self._state == "in_string" and self._key == "message":
+            self.message += ch
+
+    def _end_string(self):
+        text = "".join(self._buf)
+        if self._state == "in_key":
+            self._key = text
+            self._state = "colon"
+        else:
+            self._set_field(text)
+            self._state = "after_value"
+
+    def _nested_char(self, ch):
+        self._buf.append(ch)
+        if self._nested_string:
+            if self._nested_escape:
+                self._nested_escape = False
+            elif ch == '\\':
+                self._nested_escape = True
+            elif ch == '"':
+                self._nested_string = False
+            return
+        if ch == '"':
+            self._nested_string = True
+        elif ch in '{[':
+            self._depth += 1
+        elif ch in '}]':
+            self._depth -= 1
+            if self._depth == 0:
+                self._set_field(_parse_nested("".join(self._buf)))
+                self._state = "after_value"
+
+    def _set_field(self, value):
+        if self._key is not None:
+            self.fields[self._key] = value
+            if self._key == "message":
+                self.message = "" if value is None else str(value)
+        self._key = None
+        self._buf = []
+
+    # -- end of stream -------------------------------------------------
+
+    def finish(self):
+        """Repair whatever was received and return the normalized response dict."""
+        state = self._state
+        if state == "prefix":
+            # No object at all: treat the cleaned text as the message
+            text = "".join(self._raw).replace("```json", "").replace("```", "").strip()
+            return normalize_response({"message": text})
+
+        # Truncated output: keep the partial value that was in progress
+        if state == "in_string":
+            self._set_field("".join(self._buf))
+        elif state == "scalar":
+            self._set_field(_parse_scalar("".join(self._buf)))
+        elif state == "nested":
+            self._set_field(_parse_nested("".join(self._buf)))
+        self._state = "done"
+        return normalize_response(self.fields)
+
+
+def parse_json_block(text):
+    """Parse the first JSON object or array embedded in free text, repairing truncation."""
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None
+    start = min(starts)
+    depth = 0
+    in_string = escape = False
+    for end in range(start, len(text)):
+        ch = text[end]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            depth += 1
+        elif ch in '}]':
+            depth -= 1
+            if depth == 0:
+                # Ignore whatever follows the block (closing fences, prose)
+                return _parse_nested(text[start:end + 1])
+    return _parse_nested(text[start:])
+
+
+def parse_response(text):
+    """Parse a complete interviewer reply with the same repairs as the stream parser."""
+    parser = InterviewResponseParser()
+    parser.feed(text)
+    return parser.finish()
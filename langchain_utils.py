@@ -1,171 +1,924 @@
 import os
 import time
 import json
+import asyncio
+import contextlib
+import concurrent.futures
+import hashlib
+import threading
+import httpx
+import database as db
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
+from fake_llm import FakeChatModel
+from cassette import cassette_mode, wrap_llm
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from llm_runtime import get_pool, current_queue_wait, settle_tokens, PoolBusyError
+from history import count_tokens
+from question_cache import get_opening_cache
+from json_stream import InterviewResponseParser, parse_json_block, normalize_response
+from question_bank import get_question_bank, TOTAL_QUESTIONS
+from feedback import AnswerEvaluations, normalize_evaluation, build_report
+from resilience import get_resilience, CircuitOpenError
+from routing import ROUTES, ModelRoute, route_settings, record_route
+from providers import (PROVIDERS, Backend, ProviderFailover, configured_providers, provider_api_key,
+                       provider_model, get_health)
+
+class StreamAbandoned(RuntimeError):
+    """The consumer stopped reading a ResponseStream before it finished."""
+
+
+def _error_response(error):
+    """The interviewer reply shown for a failed call, naming the provider error."""
+    if isinstance(error, CircuitOpenError):
+        message = "⚠️ The AI interviewer is temporarily unavailable. Please try again shortly."
+    elif isinstance(error, PoolBusyError):
+        message = "⚠️ The interviewer is busy right now. Please try again in a moment."
+    else:
+        message = f"Error connecting to AI via LangChain: {str(error)}"
+    return {"message": message, "status": "ongoing", "score": None, "error": True}
+
+
+class ResponseStream:
+    """
+    Iterable over the interviewer's message text as the model streams it.
+
+    Iterate it (``for`` or ``async for`` depending on the source) to receive
+    message deltas; once exhausted, ``result`` holds the parsed response
+    dict including ``status`` and ``score``, and ``error`` the exception
+    that ended it early, if any. ``on_complete`` runs exactly once, also
+    when the caller stops iterating early (``error`` is then StreamAbandoned).
+    """
+
+    def __init__(self, open_chunks, on_complete=None):
+        self._open_chunks = open_chunks
+        self._on_complete = on_complete
+        self._parser = InterviewResponseParser()
+        self.usage = None
+        self.parse_ok = False
+        self.result = None
+        self.error = None
+
+    @classmethod
+    def from_result(cls, result):
+        """Wrap an already-known response so callers can treat it as a stream."""
+        return cls(lambda: iter([json.dumps(result, ensure_ascii=False)]))
+
+    @property
+    def fields(self):
+        """Top-level fields that have been fully received so far."""
+        return self._parser.fields
+
+    def _feed(self, chunk):
+        if not isinstance(chunk, str):
+            # AIMessageChunk: usage arrives on the final chunk
+            self.usage = _usage_from(chunk) or self.usage
+            chunk = chunk.content if isinstance(chunk.content, str) else ""
+        return self._parser.feed(chunk)
+
+    def _finish(self, error=None):
+        streamed = self._parser.message
+        self.error = error
+        if error is not None:
+            self.result = _error_response(error)
+        else:
+            self.parse_ok = self._parser.complete
+            self.result = self._parser.finish()
+            if self.usage is not None:
+                self.result["usage"] = self.usage
+
+        if self._on_complete is not None:
+            try:
+                self._on_complete(self)
+            except Exception as e:
+                print(f"Response callback failed: {e}")
+
+        # Emit whatever the caller hasn't seen yet, e.g. a non-JSON fallback reply
+        message = self.result.get("message") or ""
+        if message.startswith(streamed):
+            return message[len(streamed):]
+        return "\n\n" + message
+
+    def __iter__(self):
+        tail = None
+        try:
+            for chunk in self._open_chunks():
+                delta = self._feed(chunk)
+                if delta:
+                    yield delta
+        except Exception as e:
+            tail = self._finish(e)
+        else:
+            tail = self._finish()
+        finally:
+            if self.result is None:
+                # Closed mid-stream (e.g. the script rerun): still report it
+                self._finish(StreamAbandoned("stream closed before the reply finished"))
+        if tail:
+            yield tail
+
+    async def __aiter__(self):
+        tail = None
+        try:
+            async for chunk in self._open_chunks():
+                delta = self._feed(chunk)
+                if delta:
+                    yield delta
+        except Exception as e:
+            tail = self._finish(e)
+        else:
+            tail = self._finish()
+        finally:
+            if self.result is None:
+                self._finish(StreamAbandoned("stream closed before the reply finished"))
+        if tail:
+            yield tail
+
+
+# Define the system prompt. Everything here is identical on every turn of an
+# interview (and the instructions across all interviews), so the provider's
+# automatic prefix cache can reuse it; per-turn content follows as messages.
+INTERVIEWER_SYSTEM_PROMPT = """You are an expert technical interviewer.
+
+Your Goal:
+Conduct a realistic, tough, but fair interview based on the Job Description and the Candidate's Resume below.
+- Start by introducing yourself and asking a question relevant to the JD and their experience.
+- Focus on gaps in their resume relative to the JD.
+- Dig deep into skills they claim to have.
+- Keep the conversation professional.
+
+Current Interview State:
+- If history is empty, start the interview.
+- If candidate answered, provide brief feedback (1-2 sentences) then ask the next question.
+- Conduct EXACTLY 5 questions.
+- Each answer starts with its number, e.g. "(Answer 3 of 5.)"; trust it over your own count of the history.
+- After the 5th answer is received, immediately stop asking questions, analyze the conversation, and provide the final verdict.
+- If the status is 'finished', do not ask more questions.
+
+IMPORTANT: Respond in valid JSON format ONLY.
+Structure:
+{{
+    "message": "content of your response to the user",
+    "status": "ongoing" or "finished",
+    "score": <float 1-10 rating of the LAST answer only, null if start>,
+    "final_score": <float 1-10 rating of overall performance, null if not finished>,
+    "verdict": "SELECTED" or "NOT SELECTED" (null if not finished)
+}}
+
+Job Description:
+{job_desc}
+
+Candidate Resume Summary:
+{resume_text}
+"""
+
+START_INTERVIEW_MESSAGE = "(The candidate has joined. Start the interview.)"
+# llm_calls call type of background opening-cache top-ups
+OPENING_TOP_UP = "opening_top_up"
+# Prefixed to each answer so the interviewer knows where it is even after
+# older turns have been folded into the summary
+ANSWER_PROGRESS = "(Answer {number} of {total}.)"
+FINAL_ANSWER_PROGRESS = "(Answer {number} of {total}. This is the last answer: give your final verdict now.)"
+
+# Completion tokens budgeted per interviewer reply when estimating TPM usage
+REPLY_TOKEN_ALLOWANCE = 400
+
+SUMMARY_TEMPLATE = """You keep the interviewer's running notes for a technical interview.
+Merge the new turns into the existing notes. Keep every question that was asked,
+the key claims, technologies and examples from each answer, and any weaknesses
+noticed. Write plain prose, at most 150 words.
+
+Existing notes:
+{summary}
+
+New turns:
+{turns}
+
+Updated notes:"""
+
+BANK_TEMPLATE = """Write {count} distinct interview questions for a {level} candidate
+applying for a {family} engineering role. Focus area: {skill}.
+Each question must stand on its own, be answerable in a few minutes of
+conversation, and match the seniority level.
+
+Return ONLY a JSON object: {{"questions": ["...", "..."]}}"""
+
+EVALUATION_TEMPLATE = """You are grading one answer from a technical interview for a {level} {role} position.
+
+Question:
+{question}
+
+Candidate's answer:
+{answer}
+
+Grade the answer from 0 to 10 for technical accuracy, depth and clarity.
+Name concrete strengths and improvements that refer to what the candidate said.
+
+Return ONLY a JSON object:
+{{"score": <0-10>, "strengths": ["..."], "improvements": ["..."], "summary": "<one sentence>"}}"""
+
+GRADE_TEMPLATE = """You are reviewing the full transcript of a technical interview for a {role} position.
+Grade the candidate's overall performance from 1 to 10 across technical accuracy,
+depth, clarity and use of concrete examples, then decide whether they should be
+hired. SELECTED requires a score of 6 or higher.
+
+Transcript:
+{transcript}
+
+Return ONLY a JSON object:
+{{"final_score": <1-10>, "verdict": "SELECTED" | "NOT SELECTED"}}"""
+
+
+def _history_messages(history):
+    """Convert stored chat turns into LangChain messages, oldest first."""
+    messages = []
+    for msg in history or []:
+        if msg['role'] == 'user':
+            messages.append(HumanMessage(content=msg['content']))
+        elif msg['role'] == 'system':
+            messages.append(SystemMessage(content=msg['content']))
+        else:
+            messages.append(AIMessage(content=msg['content']))
+    return messages
+
+
+def _estimate_tokens(inputs):
+    """Rough prompt + reply token count used to schedule a call before it runs."""
+    text = "".join([
+        INTERVIEWER_SYSTEM_PROMPT, inputs["job_desc"], inputs["resume_text"], inputs["user_input"],
+        *(m.content for m in inputs["history"] if isinstance(m.content, str))
+    ])
+    return count_tokens(text) + REPLY_TOKEN_ALLOWANCE
+
+
+def _usage_from(message):
+    """Cached vs. uncached prompt tokens reported for one model reply."""
+    meta = getattr(message, "usage_metadata", None)
+    if not meta:
+        return None
+    prompt_tokens = meta.get("input_tokens", 0)
+    cached_tokens = (meta.get("input_token_details") or {}).get("cache_read", 0) or 0
+    return {
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "uncached_tokens": prompt_tokens - cached_tokens,
+        "completion_tokens": meta.get("output_tokens", 0)
+    }
+
+
+_registry_lock = threading.Lock()
+_shared_chains = {}
+_shared_coaches = {}
+_http_clients = None
+
+
+def _default_backend():
+    """Primary LLM provider from the environment: "openai" (default), "gemini" or "fake"."""
+    return configured_providers()[0]
+
+
+def _registry_key(api_key, model, temperature, backend="openai"):
+    # Hash the key so raw credentials aren't kept around as dict keys
+    return (hashlib.sha256((api_key or "").encode()).hexdigest(), model, float(temperature), backend)
+
+
+def _get_http_clients():
+    """Keep-alive HTTP clients shared by every model in the process."""
+    global _http_clients
+    if _http_clients is None:
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "64")),
+            max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "32")),
+            keepalive_expiry=60.0
+        )
+        _http_clients = (httpx.Client(limits=limits), httpx.AsyncClient(limits=limits))
+    return _http_clients
+
+
+def _build_llm(api_key, model, temperature, backend):
+    mode = cassette_mode()
+    if mode == "replay":
+        # Served entirely from the cassette: no provider client needed
+        return wrap_llm(None, model, mode)
+    if backend == "fake":
+        return wrap_llm(FakeChatModel.from_env(model), model, mode)
+    if backend not in PROVIDERS:
+        raise ValueError(f"Unknown LLM backend: {backend}")
+
+    http_client, http_async_client = _get_http_clients()
+    return wrap_llm(ChatOpenAI(
+        model=model,
+        api_key=api_key,
+        base_url=PROVIDERS[backend].base_url,
+        temperature=temperature,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        stream_usage=True,
+        # Retries and deadlines are handled by the resilience layer
+        max_retries=0
+    ), model, mode)
+
+
+def _build_chains(api_key, model, temperature, backend="openai"):
+    # Initialize LangChain model
+    llm = _build_llm(api_key, model, temperature, backend)
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", INTERVIEWER_SYSTEM_PROMPT),
+        MessagesPlaceholder("history"),
+        ("human", "{user_input}")
+    ])
+
+    return {
+        # Prompt -> LLM. The reply message is kept (rather than just its
+        # text) so its token usage can be reported.
+        "interview": prompt | llm,
+        "summary": PromptTemplate.from_template(SUMMARY_TEMPLATE) | llm | StrOutputParser(),
+        "bank": PromptTemplate.from_template(BANK_TEMPLATE) | llm | StrOutputParser(),
+        "evaluation": PromptTemplate.from_template(EVALUATION_TEMPLATE) | llm | StrOutputParser(),
+        "grade": PromptTemplate.from_template(GRADE_TEMPLATE) | llm | StrOutputParser()
+    }
+
+
+def get_shared_chains(api_key, model="gpt-4o-mini", temperature=0.7, backend=None):
+    """Return the process-wide compiled chains for these settings, building them once."""
+    backend = backend or _default_backend()
+    key = _registry_key(api_key, model, temperature, backend)
+    with _registry_lock:
+        if key not in _shared_chains:
+            _shared_chains[key] = _build_chains(api_key, model, temperature, backend)
+        return _shared_chains[key]
+
+
+def get_coach(api_key, model="gpt-4o-mini", temperature=0.7, backend=None):
+    """
+    Return the process-wide InterviewCoach for these settings.
+
+    Coaches hold no per-session state, so every session using the same key
+    and model shares one instance (and its chain and connection pool).
+    ``api_key`` is for the primary provider and may be None when the key
+    comes from the environment.
+    """
+    backend = backend or _default_backend()
+    key = _registry_key(api_key, model, temperature, backend)
+    with _registry_lock:
+        coach = _shared_coaches.get(key)
+    if coach is None:
+        coach = InterviewCoach()
+        coach.configure(api_key, model=model, temperature=temperature, backend=backend)
+        with _registry_lock:
+            coach = _shared_coaches.setdefault(key, coach)
+    return coach
+
 
 class InterviewCoach:
     def __init__(self):
         self.api_key = None
+        self.backend = None
+        self.model = None
+        self.temperature = None
         self.chain = None
+        self.routes = {}
+        self.opening_cache = None
+        self.question_bank = None
 
-    def configure(self, api_key):
-        self.api_key = api_key
-        # Initialize LangChain model
-        llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            api_key=self.api_key,
-            temperature=0.7
-        )
-        
-        # Define the system prompt template
-        template = """
-        You are an expert technical interviewer.
-        
-        Job Description:
-        {job_desc}
-        
-        Candidate Resume Summary:
-        {resume_text}
-        
-        Your Goal:
-        Conduct a realistic, tough, but fair interview based on the above Job Description and the Candidate's Resume.
-        - Start by introducing yourself and asking a question relevant to the JD and their experience.
-        - Focus on gaps in their resume relative to the JD.
-        - Dig deep into skills they claim to have.
-        - Keep the conversation professional.
-        
-        Current Interview State:
-        - If history is empty, start the interview.
-        - If candidate answered, provide brief feedback (1-2 sentences) then ask the next question.
-        - Conduct EXACTLY 5 questions.
-        - After the 5th answer is received, immediately stop asking questions, analyze the conversation, and provide the final verdict.
-        - If the status is 'finished', do not ask more questions.
-        
-        IMPORTANT: Respond in valid JSON format ONLY.
-        Structure:
-        {{
-            "message": "content of your response to the user",
-            "status": "ongoing" or "finished",
-            "score": <float 1-10 rating of the LAST answer only, null if start>,
-            "final_score": <float 1-10 rating of overall performance, null if not finished>,
-            "verdict": "SELECTED" or "NOT SELECTED" (null if not finished)
-        }}
-
-        Chat History:
-        {history}
-        
-        Candidate: {user_input}
-        
-        Interviewer (JSON):
+    def configure(self, api_key, model="gpt-4o-mini", temperature=0.7, backend=None):
         """
-        
-        prompt = PromptTemplate(
-            template=template,
-            input_variables=["job_desc", "resume_text", "history", "user_input"]
-        )
-        
-        # Create chain: Prompt -> LLM -> StrParser
-        self.chain = prompt | llm | StrOutputParser()
+        Point the coach at its LLM providers.
+
+        ``api_key`` is for the primary provider: ``backend`` ("openai",
+        "gemini" or "fake", a local simulated model for load tests), or the
+        first entry of LLM_PROVIDERS. Further providers read their keys from
+        the environment and are only used if one is set.
+        """
+        providers = configured_providers(backend)
+        self.backend = providers[0]
+        keys = {
+            provider: self._provider_key(provider, api_key if provider == self.backend else None)
+            for provider in providers
+        }
+        self.model = model
+        self.temperature = temperature
+        self.routes = {}
+        for name in ROUTES:
+            route_model, route_temperature = route_settings(name, model, temperature)
+            backends = []
+            for provider in providers:
+                key = keys.get(provider)
+                if not key:
+                    continue
+                provider_route_model = provider_model(provider, name, route_model)
+                backends.append(Backend(
+                    provider, provider_route_model,
+                    # Reuse the compiled chains and HTTP pool shared across sessions
+                    get_shared_chains(key, provider_route_model, route_temperature, provider),
+                    get_resilience(f"{provider}:{provider_route_model}"),
+                    get_health(provider, provider_route_model)
+                ))
+            self.routes[name] = ModelRoute(
+                name, backends[0].model if backends else route_model, route_temperature, ProviderFailover(backends)
+            )
+        primary = self.routes["followup"].backends.primary
+        # The key of the first provider that can serve calls
+        self.api_key = keys[primary.provider] if primary else None
+        self.chain = primary.chains["interview"] if primary else None
+        self.opening_cache = get_opening_cache()
+        self.question_bank = get_question_bank()
+
+    @staticmethod
+    def _provider_key(provider, api_key=None):
+        # The fake provider and cassette replay need no credentials
+        if provider == "fake" or cassette_mode() == "replay":
+            return api_key or "offline"
+        return api_key or provider_api_key(provider)
 
-    def get_response(self, role, user_input=None, history=None, resume_text="N/A", job_desc="N/A"):
+    def _build_inputs(self, role, user_input, history, resume_text, job_desc, answer_number=None):
         """
-        Interacts with Google Gemini via LangChain to conduct the interview.
+        Assemble the prompt variables for one interviewer turn.
+        ``answer_number`` (1-based) is stated at the start of the answer.
         """
+        if user_input and answer_number:
+            template = FINAL_ANSWER_PROGRESS if answer_number >= TOTAL_QUESTIONS else ANSWER_PROGRESS
+            user_input = template.format(number=answer_number, total=TOTAL_QUESTIONS) + "\n" + user_input
+        return {
+            "job_desc": job_desc if job_desc else f"Role: {role}",
+            "resume_text": resume_text if resume_text else "Not provided",
+            "history": _history_messages(history),
+            "user_input": user_input if user_input else START_INTERVIEW_MESSAGE
+        }
+
+    def get_response(self, role, user_input=None, history=None, resume_text="N/A", job_desc="N/A", tags=None,
+                     route="followup", answer_number=None):
+        """
+        Interacts with the LLM via LangChain to conduct the interview.
+
+        The call runs on the shared LLM pool; this thread only waits for it.
+        ``route`` picks the model for a mid-interview turn ("followup" or
+        "verdict"); opening questions always use the "opening" route.
+        ``answer_number`` tells the interviewer which answer this is.
+        """
+        # Fallback
+        if not self.api_key or not self.chain:
+             return {"message": "⚠️ API Key missing.", "status": "ongoing"}
+
+        inputs = self._build_inputs(role, user_input, history, resume_text, job_desc, answer_number)
+        try:
+            return get_pool().run(
+                lambda: self.aget_response(role, user_input, history, resume_text, job_desc, tags, route,
+                                           answer_number),
+                **self._schedule(inputs, tags, "interactive")
+            )
+        except PoolBusyError as e:
+            return _error_response(e)
+
+    async def aget_response(self, role, user_input=None, history=None, resume_text="N/A", job_desc="N/A", tags=None,
+                            route="followup", answer_number=None):
+        """Asyncio-native counterpart of get_response."""
         # Fallback
         if not self.api_key or not self.chain:
              return {"message": "⚠️ API Key missing.", "status": "ongoing"}
 
+        inputs = self._build_inputs(role, user_input, history, resume_text, job_desc, answer_number)
+        key = self._opening_key(user_input, history, inputs)
+        if key:
+            cached = await asyncio.to_thread(self.opening_cache.get, key)
+            if cached is not None:
+                # Its variant count is a sqlite read too: keep it off the loop
+                await asyncio.to_thread(self._top_up_opening, key, inputs)
+                return cached
+
+        data = await self._ainvoke(inputs, "opening" if key else self._turn_route(user_input, history, route), tags)
+        if key:
+            await asyncio.to_thread(self._store_opening, key, data)
+        return data
+
+    def _turn_route(self, user_input, history, route):
+        return "opening" if not (user_input or history) else route
+
+    async def _ainvoke(self, inputs, call_type, tags=None, record_as=None):
+        """
+        One interviewer turn on ``call_type``'s route. ``record_as`` files
+        the call under another call type in llm_calls (e.g. background work).
+        """
+        route = self.routes[call_type]
+        queue_wait = current_queue_wait()
+        started = time.perf_counter()
+        usage, parse_ok, error = None, False, None
+        served = {}
         try:
-            # Format history string
-            history_str = ""
-            if history:
-                for msg in history:
-                    role_label = "Candidate" if msg['role'] == 'user' else "Interviewer"
-                    history_str += f"{role_label}: {msg['content']}\n"
-            
             # Run the chain
-            response_text = self.chain.invoke({
-                "job_desc": job_desc if job_desc else f"Role: {role}",
-                "resume_text": resume_text if resume_text else "Not provided",
-                "history": history_str,
-                "user_input": user_input if user_input else ""
-            })
-            
-            # Parse JSON
-            # Clean potential markdown code blocks if the model adds them
-            clean_text = response_text.replace("```json", "").replace("```", "").strip()
-            
+            reply = await route.backends.call(lambda chains: chains["interview"].ainvoke(inputs), served)
+            parser = InterviewResponseParser()
+            parser.feed(reply.content)
+            parse_ok = parser.complete
+            data = parser.finish()
+            data["usage"] = usage = _usage_from(reply)
+            if usage:
+                settle_tokens(usage["prompt_tokens"] + usage["completion_tokens"])
+            return data
+
+        except Exception as e:
+            error = str(e)
+            return _error_response(e)
+        finally:
+            self._record_call(record_as or call_type, tags, queue_wait, None,
+                              time.perf_counter() - started, usage, parse_ok, error, served)
+
+    def _record_call(self, call_type, tags, queue_s, ttft_s, total_s, usage=None, parse_ok=False, error=None,
+                     served=None):
+        """
+        Queue one call's latency and token metrics for the llm_calls table.
+        ``served`` holds the provider and model of the backend that handled
+        the call (filled in by ProviderFailover); the route's primary
+        backend is assumed when it's missing.
+        """
+        tags = tags or {}
+        usage = usage or {}
+        served = served or {}
+        route = self.routes.get(call_type)
+        primary = route.backends.primary if route else None
+        provider = served.get("provider") or (primary.provider if primary else self.backend)
+        model = served.get("model") or (route.model if route else self.model)
+        record_route(call_type, model, total_s, error, provider)
+        db.record_llm_call(
+            session_id=tags.get("session_id"),
+            user_id=tags.get("user_id"),
+            role=tags.get("role"),
+            provider=provider,
+            model=model,
+            call_type=call_type,
+            queue_ms=queue_s * 1000 if queue_s is not None else None,
+            ttft_ms=ttft_s * 1000 if ttft_s is not None else None,
+            total_ms=total_s * 1000 if total_s is not None else None,
+            prompt_tokens=usage.get("prompt_tokens"),
+            cached_tokens=usage.get("cached_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            parse_ok=int(bool(parse_ok)),
+            error=error
+        )
+
+    @contextlib.asynccontextmanager
+    async def _recorded(self, call_type, tags=None):
+        """
+        Time the enclosed non-streaming call and record it with _record_call.
+        Yields a dict: pass it as ``served`` to the route's backends and set
+        its "parse_ok" once the reply has been parsed.
+        """
+        call = {"parse_ok": False}
+        queue_wait = current_queue_wait()
+        started = time.perf_counter()
+        error = None
+        try:
+            yield call
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self._record_call(call_type, tags, queue_wait, None, time.perf_counter() - started,
+                              parse_ok=call["parse_ok"] and error is None, error=error, served=call)
+
+    def _schedule(self, inputs, tags, lane):
+        """Scheduler lane, fairness key and token estimate for a pool submission."""
+        tags = tags or {}
+        return {
+            "lane": lane,
+            "user": tags.get("user_id") or tags.get("session_id"),
+            "tokens": _estimate_tokens(inputs)
+        }
+
+    def _stream_call(self, inputs, call_type, tags, in_pool=True, on_complete=None):
+        """ResponseStream over the chain, timed and recorded once it finishes, fails or is abandoned."""
+        route = self.routes[call_type]
+        timing = {"queue": 0.0, "ttft": None, "total": None}
+        served = {}
+
+        async def chunks():
+            timing["queue"] = current_queue_wait()
+            started = timing["started"] = time.perf_counter()
+            usage = None
             try:
-                data = json.loads(clean_text)
-                return data
-            except json.JSONDecodeError:
-                return {
-                    "message": clean_text,
-                    "status": "ongoing",
-                    "score": None
-                }
+                async for chunk in route.backends.stream(lambda chains: chains["interview"].astream(inputs), served):
+                    if timing["ttft"] is None:
+                        timing["ttft"] = time.perf_counter() - started
+                    usage = _usage_from(chunk) or usage
+                    yield chunk
+            finally:
+                timing["total"] = time.perf_counter() - started
+                if usage:
+                    settle_tokens(usage["prompt_tokens"] + usage["completion_tokens"])
+
+        def completed(stream):
+            # Runs for finished, failed and abandoned streams alike. An
+            # abandoned in-pool stream may not have timed itself yet.
+            total = timing["total"]
+            if total is None and timing.get("started") is not None:
+                total = time.perf_counter() - timing["started"]
+            error = str(stream.error) if stream.error is not None else None
+            self._record_call(call_type, tags, timing["queue"], timing["ttft"], total,
+                              stream.usage, stream.parse_ok, error, served)
+            if on_complete is not None:
+                on_complete(stream)
 
+        if in_pool:
+            schedule = self._schedule(inputs, tags, "interactive")
+            return ResponseStream(lambda: get_pool().iter_async(chunks, **schedule), completed)
+        return ResponseStream(chunks, completed)
+
+    def _opening_key(self, user_input, history, inputs):
+        """Opening-question cache key, or None when this isn't a start-of-interview call."""
+        if user_input or history or self.opening_cache is None:
+            return None
+        return self.opening_cache.make_key(self.routes["opening"].model, inputs["job_desc"], inputs["resume_text"])
+
+    def _store_opening(self, key, data):
+        if data.get("error") or not data.get("message"):
+            return
+        try:
+            self.opening_cache.put(key, data)
+        except Exception as e:
+            print(f"Opening cache write failed: {e}")
+
+    def _top_up_opening(self, key, inputs):
+        """
+        Generate another variant in the background while the pool is short.
+        Reads the cache database, so never call it on the event loop thread.
+        """
+        cache = self.opening_cache
+        try:
+            if not cache.needs_variants(key) or not cache.claim_fill(key):
+                return
         except Exception as e:
-            return {
-                "message": f"Error connecting to AI via LangChain: {str(e)}",
-                "status": "ongoing",
-                "score": None
-            }
-
-    def ask_question(self, user_input, interview_data):
-        """Ask the next interview question and process the user's answer."""
+            print(f"Opening cache read failed: {e}")
+            return
+
+        async def fill():
+            try:
+                # Not part of any interview: keep it out of the per-session numbers
+                data = await self._ainvoke(inputs, "opening", record_as=OPENING_TOP_UP)
+                await asyncio.to_thread(self._store_opening, key, data)
+            finally:
+                cache.release_fill(key)
+
+        try:
+            # Background work never waits for a pool slot
+            get_pool().submit(fill, timeout=0, **self._schedule(inputs, None, "background"))
+        except PoolBusyError:
+            cache.release_fill(key)
+
+    def stream_response(self, role, user_input=None, history=None, resume_text="N/A", job_desc="N/A", tags=None,
+                        route="followup", answer_number=None):
+        """
+        Streaming variant of get_response.
+
+        Returns a ResponseStream that yields the "message" text as tokens
+        arrive; its ``result`` holds the full response dict once exhausted.
+        """
+        if not self.api_key or not self.chain:
+            return ResponseStream.from_result({"message": "⚠️ API Key missing.", "status": "ongoing"})
+
+        inputs = self._build_inputs(role, user_input, history, resume_text, job_desc, answer_number)
+        key = self._opening_key(user_input, history, inputs)
+        if key:
+            cached = self.opening_cache.get(key)
+            if cached is not None:
+                self._top_up_opening(key, inputs)
+                return ResponseStream.from_result(cached)
+
+        return self._stream_call(
+            inputs, "opening" if key else self._turn_route(user_input, history, route), tags,
+            on_complete=(lambda stream: self._store_opening(key, stream.result)) if key else None
+        )
+
+    def astream_response(self, role, user_input=None, history=None, resume_text="N/A", job_desc="N/A", tags=None,
+                         route="followup", answer_number=None):
+        """Async streaming variant of get_response; iterate with ``async for``."""
+        if not self.api_key or not self.chain:
+            return ResponseStream.from_result({"message": "⚠️ API Key missing.", "status": "ongoing"})
+
+        inputs = self._build_inputs(role, user_input, history, resume_text, job_desc, answer_number)
+        return self._stream_call(inputs, self._turn_route(user_input, history, route), tags, in_pool=False)
+
+    def _question_args(self, interview_data):
+        """Derive the role, job description and resume for an interview."""
         job_title = interview_data.get("job_title", "")
         company = interview_data.get("company", "")
         level = interview_data.get("level", "")
-        
+
         job_desc = f"Position: {job_title} at {company} (Level: {level})"
-        resume_text = interview_data.get("resume", "Not provided")
-        
-        response = self.get_response(
-            role=job_title,
+        if interview_data.get("skills"):
+            job_desc += f"\nKey skills: {', '.join(interview_data['skills'])}"
+        # Prefer the role-relevant excerpt computed at setup over the full resume
+        resume_text = interview_data.get("resume_context") or interview_data.get("resume") or "Not provided"
+        tags = {
+            "session_id": interview_data.get("session_id"),
+            "user_id": interview_data.get("user_id"),
+            "role": job_title
+        }
+        return {"role": job_title, "resume_text": resume_text, "job_desc": job_desc, "tags": tags}
+
+    def _bank_reply(self, user_input, interview_data):
+        """
+        Serve the next question from the precomputed bank, or return None to
+        fall through to the LLM (bank mode off, no matching questions, or
+        every question answered and the verdict is due).
+
+        ``interview_data["bank_asked"]`` lists the bank question ids already
+        asked; the caller appends the returned ``question_id``.
+        """
+        if self.question_bank is None:
+            return None
+        asked = interview_data.get("bank_asked") or []
+        if len(asked) >= TOTAL_QUESTIONS or (user_input and not asked):
+            return None
+
+        row = self.question_bank.draw(
+            interview_data.get("job_title", ""),
+            interview_data.get("level", ""),
+            interview_data.get("skills", []),
+            exclude=asked
+        )
+        if row is None:
+            return None
+
+        number = len(asked) + 1
+        if asked:
+            message = f"Thank you. Question {number} of {TOTAL_QUESTIONS}: {row['question']}"
+        else:
+            message = (
+                f"Hello! I'll be your interviewer for the {interview_data.get('job_title', '')} position "
+                f"at {interview_data.get('company', '')}. We'll go through {TOTAL_QUESTIONS} questions.\n\n"
+                f"Question 1: {row['question']}"
+            )
+        return {"message": message, "status": "ongoing", "score": None, "question_id": row["id"]}
+
+    @staticmethod
+    def _answer_route(answer_number):
+        """The last answer gets the verdict route; earlier ones the follow-up route."""
+        return "verdict" if answer_number and answer_number >= TOTAL_QUESTIONS else "followup"
+
+    def ask_question(self, user_input, interview_data, history=None, answer_number=None):
+        """
+        Ask the next interview question and process the user's answer.
+
+        ``answer_number`` (1-based) is stated in the prompt and lets the final
+        answer go to the verdict model.
+        """
+        response = self._bank_reply(user_input, interview_data) or self.get_response(
             user_input=user_input,
-            history=[],
-            resume_text=resume_text,
-            job_desc=job_desc
+            history=history,
+            route=self._answer_route(answer_number),
+            answer_number=answer_number,
+            **self._question_args(interview_data)
         )
         
         return response.get("message", "Unable to get response")
 
-    def get_feedback(self, messages, interview_data):
-        """Generate comprehensive feedback on the interview performance."""
-        job_title = interview_data.get("job_title", "")
-        company = interview_data.get("company", "")
-        
-        # Create a summary of all interactions
-        summary = "Interview Summary:\n"
+    def stream_question(self, user_input, interview_data, history=None, answer_number=None):
+        """Like ask_question, but returns a ResponseStream of the reply."""
+        banked = self._bank_reply(user_input, interview_data)
+        if banked is not None:
+            return ResponseStream.from_result(banked)
+        return self.stream_response(
+            user_input=user_input,
+            history=history,
+            route=self._answer_route(answer_number),
+            answer_number=answer_number,
+            **self._question_args(interview_data)
+        )
+
+    def prefetch_opening(self, interview_data):
+        """
+        Start generating the opening question in the background.
+
+        Returns a concurrent.futures.Future of the response dict, or None if
+        the coach isn't configured or the LLM pool is saturated.
+        """
+        if not self.api_key or not self.chain:
+            return None
+        banked = self._bank_reply(None, interview_data)
+        if banked is not None:
+            future = concurrent.futures.Future()
+            future.set_result(banked)
+            return future
+        args = self._question_args(interview_data)
+        inputs = self._build_inputs(args["role"], None, None, args["resume_text"], args["job_desc"])
+        try:
+            return get_pool().submit(
+                lambda: self.aget_response(**args),
+                timeout=0,
+                **self._schedule(inputs, args["tags"], "interactive")
+            )
+        except PoolBusyError:
+            return None
+
+    def opening_question(self, interview_data):
+        """
+        Generate the opening question now, on the calling thread's behalf
+        (the fallback when no prefetched one is available). Returns the
+        response dict.
+        """
+        if not self.api_key or not self.chain:
+            # Nothing to show in the transcript until a key is configured
+            return {"message": "⚠️ API Key missing.", "status": "ongoing", "error": True}
+        return self._bank_reply(None, interview_data) or self.get_response(**self._question_args(interview_data))
+
+    async def aask_question(self, user_input, interview_data, history=None, answer_number=None):
+        """Asyncio-native counterpart of ask_question."""
+        response = self._bank_reply(user_input, interview_data) or await self.aget_response(
+            user_input=user_input,
+            history=history,
+            route=self._answer_route(answer_number),
+            answer_number=answer_number,
+            **self._question_args(interview_data)
+        )
+
+        return response.get("message", "Unable to get response")
+
+    async def asummarize_history(self, summary, messages):
+        """Fold older interview turns into the running summary notes."""
+        turns = ""
         for msg in messages:
-            role = "You" if msg["role"] == "user" else "Interviewer"
-            summary += f"\n{role}: {msg['content'][:200]}...\n"
-        
-        feedback = f"""
-## Interview Feedback for {job_title} at {company}
+            role_label = "Candidate" if msg['role'] == 'user' else "Interviewer"
+            turns += f"{role_label}: {msg['content']}\n"
 
-### Performance Summary
-Based on your {len([m for m in messages if m['role'] == 'user'])} responses during the interview:
+        route = self.routes["summary"]
+        async with self._recorded("summary") as call:
+            notes = await route.backends.call(lambda chains: chains["summary"].ainvoke({
+                "summary": summary or "(none yet)",
+                "turns": turns
+            }), call)
+            call["parse_ok"] = True
+            return notes
 
-**Strengths:**
-- You demonstrated good communication skills
-- Your technical knowledge appeared sound
-- You asked clarifying questions when needed
+    async def agenerate_bank_questions(self, family, level, skill, count=10):
+        """Generate questions for one question-bank profile (offline build)."""
+        route = self.routes["bank"]
+        async with self._recorded("bank", {"role": f"{family}/{level}/{skill}"}) as call:
+            text = await route.backends.call(lambda chains: chains["bank"].ainvoke({
+                "family": family, "level": level, "skill": skill, "count": count
+            }), call)
+            parsed = parse_json_block(text)
+            if isinstance(parsed, dict):
+                parsed = parsed.get("questions")
+            questions = [str(q) for q in parsed or [] if q]
+            call["parse_ok"] = bool(questions)
+            return questions
 
-**Areas for Improvement:**
-- Consider providing more specific examples
-- Practice explaining complex concepts more concisely
-- Work on structuring your answers with clear problem-solving steps
+    async def aevaluate_answer(self, question, answer, interview_data, route="answer_score"):
+        """
+        Grade one answer. Runs in the background while the interview continues
+        ("answer_score" route), or on the "report" route when the Results page
+        is waiting for it.
+        """
+        call_type = route
+        route = self.routes[route]
+        tags = self._question_args(interview_data)["tags"]
+        async with self._recorded(call_type, tags) as call:
+            text = await route.backends.call(lambda chains: chains["evaluation"].ainvoke({
+                "role": interview_data.get("job_title", ""),
+                "level": interview_data.get("level", ""),
+                "question": question,
+                "answer": answer
+            }), call)
+            evaluation = normalize_evaluation(text)
+            call["parse_ok"] = not evaluation.get("error")
+            return evaluation
 
-**Recommendations:**
-1. Review system design principles
-2. Practice coding challenges on LeetCode
-3. Prepare specific examples from your past projects
-4. Mock interview with peers for feedback
+    async def agrade_transcript(self, messages, role):
+        """Grade a stored interview transcript (offline regrading); returns final_score and verdict."""
+        route = self.routes["grade"]
+        transcript = "\n".join(
+            f"{'Candidate' if msg['role'] == 'user' else 'Interviewer'}: {msg['content']}"
+            for msg in messages if msg.get('role') in ('user', 'assistant')
+        )
+        async with self._recorded("grade", {"role": role}) as call:
+            text = await route.backends.call(lambda chains: chains["grade"].ainvoke({
+                "role": role or "software engineering",
+                "transcript": transcript
+            }), call)
+            parsed = parse_json_block(text)
+            if not isinstance(parsed, dict):
+                raise ValueError("grader reply was not valid JSON")
+            data = normalize_response(parsed)
+            grade = {"final_score": data.get("final_score"), "verdict": data.get("verdict")}
+            call["parse_ok"] = grade["final_score"] is not None
+            return grade
 
-Keep practicing and you'll improve significantly!
-"""
-        return feedback
+    def get_feedback(self, messages, interview_data, evaluations=None):
+        """
+        Assemble the interview report from the per-answer evaluations.
+
+        ``evaluations`` is the interview's AnswerEvaluations; answers graded in
+        the background are reused and any missing ones are graded now.
+        """
+        if evaluations is None:
+            evaluations = AnswerEvaluations(interview_data.get("session_id"))
+        if self.api_key and self.chain:
+            evaluations.ensure(self, messages, interview_data)
+            answers = evaluations.collect(self, interview_data)
+        else:
+            answers = []
+
+        final = next((m for m in reversed(messages) if m["role"] == "assistant" and m.get("status") == "finished"), None)
+        return build_report(answers, interview_data, final)
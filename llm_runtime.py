@@ -0,0 +1,184 @@
+"""
+Process-wide asyncio runtime for LLM calls.
+
+Every interview turn, whichever Streamlit session it comes from, runs on one
+background event loop. A fair-share scheduler admits requests (capping how
+many are in flight and pacing them to the provider's rate limits) and a
+bounded pending count pushes back on callers when the provider can't keep
+up, so thread count and memory stay flat as sessions grow.
+"""
+
+import os
+import time
+import queue
+import asyncio
+import threading
+import contextvars
+from scheduler import FairScheduler
+
+# Seconds the current pool task waited to be admitted, and the token
+# estimate the scheduler charged for it
+_queue_wait = contextvars.ContextVar("llm_queue_wait", default=0.0)
+_admitted_tokens = contextvars.ContextVar("llm_admitted_tokens", default=None)
+
+
+def current_queue_wait():
+    """How long the running pool task queued before it started (seconds)."""
+    return _queue_wait.get()
+
+
+def settle_tokens(actual):
+    """Correct the scheduler's TPM charge for the running pool task with its real usage."""
+    estimate = _admitted_tokens.get()
+    if estimate is None or _pool is None or not actual:
+        return
+    _admitted_tokens.set(None)
+    _pool.scheduler.adjust_tokens(actual - estimate)
+
+
+class PoolBusyError(RuntimeError):
+    """Raised when the LLM pool's pending queue stays full past the timeout."""
+
+
+class LLMPool:
+    """Bounded pool of LLM coroutines multiplexed on a shared event loop."""
+
+    def __init__(self, max_concurrency=16, max_pending=256, queue_timeout=30.0, rpm=0, tpm=0):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.scheduler = FairScheduler(max_concurrency=max_concurrency, rpm=rpm, tpm=tpm)
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._pending_count = 0
+        self._lock = threading.Lock()
+        self._loop = None
+
+    @property
+    def loop(self):
+        """The shared event loop, started on a daemon thread on first use."""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    self._start()
+        return self._loop
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="llm-pool", daemon=True).start()
+        ready.wait()
+        self._loop = loop
+
+    async def _run(self, coro_factory, submitted_at, lane, user, tokens):
+        try:
+            await self.scheduler.acquire(user, lane, tokens)
+            _queue_wait.set(time.perf_counter() - submitted_at)
+            _admitted_tokens.set(tokens)
+            self.in_flight += 1
+            try:
+                return await coro_factory()
+            finally:
+                self.in_flight -= 1
+                self.scheduler.release()
+        finally:
+            with self._lock:
+                self._pending_count -= 1
+            self._pending.release()
+
+    def submit(self, coro_factory, timeout=None, lane="interactive", user=None, tokens=0):
+        """
+        Schedule ``coro_factory()`` on the shared loop.
+
+        Returns a concurrent.futures.Future. Blocks while ``max_pending`` calls
+        are already queued and raises PoolBusyError if no slot frees up within
+        ``timeout`` seconds (defaults to the pool's queue_timeout). ``lane``,
+        ``user`` and the estimated ``tokens`` drive the fair-share scheduler.
+        """
+        timeout = self.queue_timeout if timeout is None else timeout
+        if not self._pending.acquire(timeout=timeout):
+            raise PoolBusyError(f"LLM pool saturated ({self.max_pending} requests pending)")
+        with self._lock:
+            self._pending_count += 1
+        try:
+            return asyncio.run_coroutine_threadsafe(
+                self._run(coro_factory, time.perf_counter(), lane, user, tokens), self.loop
+            )
+        except Exception:
+            with self._lock:
+                self._pending_count -= 1
+            self._pending.release()
+            raise
+
+    def run(self, coro_factory, timeout=None, **schedule):
+        """Run ``coro_factory()`` on the shared loop and wait for its result."""
+        return self.submit(coro_factory, timeout, **schedule).result()
+
+    def iter_async(self, agen_factory, timeout=None, **schedule):
+        """
+        Drive the async iterator from ``agen_factory()`` on the shared loop and
+        yield its items on the calling thread.
+        """
+        items = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in agen_factory():
+                    items.put((item, None))
+            except Exception as e:
+                items.put((None, e))
+            finally:
+                items.put((done, None))
+
+        future = self.submit(pump, timeout, **schedule)
+        try:
+            while True:
+                item, error = items.get()
+                if error is not None:
+                    raise error
+                if item is done:
+                    return
+                yield item
+        finally:
+            # Consumer stopped early (e.g. the script rerun): release the slot
+            future.cancel()
+
+    def stats(self):
+        """Snapshot of the pool's load for monitoring."""
+        with self._lock:
+            pending = self._pending_count
+        stats = {
+            "in_flight": self.in_flight,
+            "queued": max(pending - self.in_flight, 0),
+            "max_concurrency": self.max_concurrency,
+            "max_pending": self.max_pending,
+        }
+        stats.update(self.scheduler.stats())
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide LLM pool, sized from the environment."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = LLMPool(
+                    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+                    max_pending=int(os.getenv("LLM_MAX_PENDING", "256")),
+                    queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "30")),
+                    rpm=int(os.getenv("LLM_RPM", "0")),
+                    tpm=int(os.getenv("LLM_TPM", "0")),
+                )
+    return _pool
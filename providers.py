@@ -0,0 +1,240 @@
+"""
+Multiple LLM providers behind one interface, with latency-aware failover.
+
+Providers are listed in preference order in LLM_PROVIDERS. Without it,
+LLM_BACKEND (if set) comes first, followed by every provider whose API key
+is in the environment, so a lone GEMINI_API_KEY is enough to run on
+Gemini. Each route gets one backend per provider that has an API key, and
+every call goes to the fastest healthy backend by rolling latency; a call
+that fails with a provider-side error falls over to the next one, so a
+slowdown or outage at one vendor doesn't stall interviews:
+
+    LLM_PROVIDERS=openai,gemini
+    OPENAI_API_KEY=...
+    GEMINI_API_KEY=...                     # or GOOGLE_API_KEY
+    GEMINI_MODEL=gemini-2.0-flash          # model used on every Gemini route
+    LLM_MODEL_VERDICT_GEMINI=gemini-2.5-pro
+
+Gemini is reached through its OpenAI-compatible endpoint, so every
+provider is built on the same ChatOpenAI client and HTTP pool.
+"""
+
+import os
+import time
+import random
+import threading
+from collections import deque, namedtuple
+from resilience import LatencyWindow, CircuitOpenError, is_retryable
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+ProviderSpec = namedtuple("ProviderSpec", ["name", "label", "key_env", "base_url", "default_model"])
+
+PROVIDERS = {
+    # default_model None: the provider takes the route's configured model name
+    "openai": ProviderSpec("openai", "OpenAI", ("OPENAI_API_KEY",), None, None),
+    "gemini": ProviderSpec("gemini", "Google Gemini", ("GEMINI_API_KEY", "GOOGLE_API_KEY"), GEMINI_BASE_URL,
+                           "gemini-2.0-flash"),
+    "fake": ProviderSpec("fake", "Simulated", (), None, None),
+}
+
+# Auth and missing-model errors are specific to one provider's account, so
+# another provider may still serve the call
+_FAILOVER_STATUS = {401, 403, 404}
+
+Backend = namedtuple("Backend", ["provider", "model", "chains", "resilience", "health"])
+
+
+def configured_providers(backend=None):
+    """
+    Provider names in preference order: LLM_PROVIDERS if set, otherwise
+    ``backend`` or LLM_BACKEND followed by every provider with a key in the
+    environment. Falls back to OpenAI when nothing is configured.
+    """
+    names = [name.strip().lower() for name in os.getenv("LLM_PROVIDERS", "").split(",") if name.strip()]
+    if not names:
+        preferred = backend or os.getenv("LLM_BACKEND")
+        names = [preferred] if preferred else []
+        names += [name for name in PROVIDERS if name not in names and provider_api_key(name)]
+        names = names or ["openai"]
+    for name in names:
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown LLM provider: {name}")
+    return names
+
+
+def provider_api_key(name):
+    """API key for a provider from its environment variables, or None."""
+    for var in PROVIDERS[name].key_env:
+        if os.getenv(var):
+            return os.getenv(var)
+    return None
+
+
+def provider_label(name):
+    """Display name for a provider, e.g. "Google Gemini"."""
+    spec = PROVIDERS.get(name)
+    return spec.label if spec else name.title()
+
+
+def provider_model(name, route, model):
+    """Model for ``route`` on provider ``name``; ``model`` is the route's configured model."""
+    spec = PROVIDERS[name]
+    override = os.getenv(f"LLM_MODEL_{route.upper()}_{name.upper()}")
+    if override:
+        return override
+    if spec.default_model is None:
+        return model
+    return os.getenv(f"{name.upper()}_MODEL") or spec.default_model
+
+
+def fails_over(error):
+    """True when another provider might succeed where this one failed."""
+    if isinstance(error, CircuitOpenError) or is_retryable(error):
+        return True
+    return getattr(error, "status_code", None) in _FAILOVER_STATUS
+
+
+class ProviderHealth:
+    """Rolling error rate and latency for one provider backend."""
+
+    def __init__(self, window=50):
+        self._outcomes = deque(maxlen=window)
+        self._latency = {"call": LatencyWindow(), "stream": LatencyWindow()}
+        self._lock = threading.Lock()
+
+    def record(self, kind, seconds, ok):
+        with self._lock:
+            self._outcomes.append(ok)
+            if ok and seconds is not None:
+                self._latency[kind].add(seconds)
+
+    def error_rate(self):
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return 1 - sum(self._outcomes) / len(self._outcomes)
+
+    def latency(self, kind):
+        """Median latency for ``kind`` ("call" total or "stream" first token), or None if unmeasured."""
+        with self._lock:
+            return self._latency[kind].percentile(50)
+
+    def snapshot(self):
+        return {
+            "error_rate": self.error_rate(),
+            "call_p50": self.latency("call"),
+            "stream_ttft_p50": self.latency("stream"),
+        }
+
+
+_health = {}
+_health_lock = threading.Lock()
+
+
+def get_health(provider, model):
+    """Process-wide health tracker for a provider/model pair."""
+    key = f"{provider}:{model}"
+    with _health_lock:
+        if key not in _health:
+            _health[key] = ProviderHealth(int(os.getenv("LLM_PROVIDER_WINDOW", "50")))
+        return _health[key]
+
+
+def provider_stats():
+    """Error rate and latency per provider backend, keyed "provider:model"."""
+    with _health_lock:
+        return {key: health.snapshot() for key, health in _health.items()}
+
+
+class ProviderFailover:
+    """
+    Calls a route's chains on the fastest healthy backend, failing over in
+    rank order. Backends whose breaker is open or whose recent error rate
+    exceeds LLM_PROVIDER_MAX_ERROR_RATE are only tried after healthy ones.
+    """
+
+    def __init__(self, backends):
+        self.backends = list(backends)
+        self.max_error_rate = float(os.getenv("LLM_PROVIDER_MAX_ERROR_RATE", "0.5"))
+        # Share of calls sent to a random healthy backend to keep its latency fresh
+        self.explore = float(os.getenv("LLM_PROVIDER_EXPLORE", "0.05"))
+
+    @property
+    def primary(self):
+        return self.backends[0] if self.backends else None
+
+    def _healthy(self, backend):
+        return backend.resilience.breaker.state != "open" and backend.health.error_rate() <= self.max_error_rate
+
+    def ranked(self, kind):
+        if len(self.backends) <= 1:
+            return list(self.backends)
+        healthy = [b for b in self.backends if self._healthy(b)]
+        degraded = [b for b in self.backends if not self._healthy(b)]
+
+        def speed(backend):
+            latency = backend.health.latency(kind)
+            # Unmeasured backends go first so they get measured; ties keep configured order
+            return (latency is not None, latency or 0.0)
+
+        healthy.sort(key=speed)
+        if len(healthy) > 1 and random.random() < self.explore:
+            healthy.insert(0, healthy.pop(random.randrange(1, len(healthy))))
+        return healthy + degraded
+
+    @staticmethod
+    def _serving(backend, served):
+        if served is not None:
+            served["provider"] = backend.provider
+            served["model"] = backend.model
+
+    async def call(self, invoke, served=None):
+        """
+        Await ``invoke(chains)`` on the best backend, failing over on provider
+        errors. The provider and model that served the call (or last failed)
+        are stored in the ``served`` dict when one is given.
+        """
+        last_error = None
+        for backend in self.ranked("call"):
+            self._serving(backend, served)
+            started = time.monotonic()
+            try:
+                result = await backend.resilience.call(lambda: invoke(backend.chains))
+            except Exception as e:
+                if not isinstance(e, CircuitOpenError):
+                    backend.health.record("call", None, False)
+                if not fails_over(e):
+                    raise
+                last_error = e
+                continue
+            backend.health.record("call", time.monotonic() - started, True)
+            return result
+        raise last_error or CircuitOpenError("No LLM provider is configured")
+
+    async def stream(self, open_stream, served=None):
+        """
+        Iterate ``open_stream(chains)`` on the best backend. Failover only
+        happens before the first chunk; after that errors propagate.
+        ``served`` is filled in as for ``call``.
+        """
+        last_error = None
+        for backend in self.ranked("stream"):
+            self._serving(backend, served)
+            started = time.monotonic()
+            ttft = None
+            try:
+                async for chunk in backend.resilience.stream(lambda: open_stream(backend.chains)):
+                    if ttft is None:
+                        ttft = time.monotonic() - started
+                    yield chunk
+            except Exception as e:
+                if not isinstance(e, CircuitOpenError):
+                    backend.health.record("stream", None, False)
+                if ttft is not None or not fails_over(e):
+                    raise
+                last_error = e
+                continue
+            backend.health.record("stream", ttft if ttft is not None else time.monotonic() - started, True)
+            return
+        raise last_error or CircuitOpenError("No LLM provider is configured")
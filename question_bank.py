@@ -0,0 +1,268 @@
+"""
+Precomputed interview question bank.
+
+Setup constrains interviews to a known set of skills and seniority levels, so
+questions for each skill / level / role family profile are generated offline
+and stored in SQLite. In bank mode (QUESTION_SOURCE=bank) the coach draws the
+opening and follow-up questions from here with a local index lookup and only
+calls the LLM for scoring and the final verdict.
+
+Build or extend the bank with:
+
+    python question_bank.py build --per-profile 10
+    python question_bank.py stats
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import argparse
+import threading
+from database import DB_NAME
+
+BANK_DB = os.path.join(os.path.dirname(DB_NAME), "question_bank.db")
+
+TOTAL_QUESTIONS = 5
+
+SKILLS = [
+    "Python", "JavaScript", "TypeScript", "Java", "C++", "Go", "Rust",
+    "React", "Vue", "Angular", "Node.js", "Django", "FastAPI",
+    "AWS", "GCP", "Azure", "Docker", "Kubernetes", "Terraform",
+    "SQL", "MongoDB", "Redis", "PostgreSQL",
+    "System Design", "Microservices", "REST API", "GraphQL"
+]
+
+LEVELS = ["Junior", "Mid-Level", "Senior", "Lead/Principal"]
+
+GENERAL_SKILL = "General"
+
+# Checked in order: the first family with a matching keyword wins
+ROLE_FAMILIES = [
+    ("fullstack", ("full stack", "fullstack", "full-stack")),
+    ("ml", ("machine learning", "ml", "ai", "data scientist", "deep learning")),
+    ("data", ("data", "analytics", "analyst", "bi", "etl")),
+    ("devops", ("devops", "sre", "reliability", "infrastructure", "cloud", "platform")),
+    ("mobile", ("mobile", "ios", "android")),
+    ("frontend", ("frontend", "front-end", "front end", "ui", "web")),
+    ("backend", ("backend", "back-end", "back end", "api", "server")),
+]
+GENERAL_FAMILY = "general"
+
+
+def role_family(job_title):
+    """Map a free-text job title onto one of the bank's role families."""
+    title = (job_title or "").lower()
+    for family, keywords in ROLE_FAMILIES:
+        for keyword in keywords:
+            if re.search(rf"\b{re.escape(keyword)}\b", title):
+                return family
+    return GENERAL_FAMILY
+
+
+def all_families():
+    return [family for family, _ in ROLE_FAMILIES] + [GENERAL_FAMILY]
+
+
+class QuestionBank:
+    """SQLite store of pregenerated questions, indexed by profile."""
+
+    def __init__(self, path=BANK_DB):
+        self.path = path
+        self._init_db()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                family TEXT NOT NULL,
+                level TEXT NOT NULL,
+                skill TEXT NOT NULL,
+                question TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                UNIQUE (family, level, skill, question)
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_questions_profile ON questions (family, level, skill)')
+        conn.commit()
+        conn.close()
+
+    def add(self, family, level, skill, questions):
+        """Store generated questions for a profile; returns how many were new."""
+        now = time.time()
+        conn = self._connect()
+        before = conn.total_changes
+        conn.executemany(
+            'INSERT OR IGNORE INTO questions (family, level, skill, question, created_at) VALUES (?, ?, ?, ?, ?)',
+            [(family, level, skill, q.strip(), now) for q in questions if q and q.strip()]
+        )
+        conn.commit()
+        added = conn.total_changes - before
+        conn.close()
+        return added
+
+    def count(self, family, level, skill):
+        conn = self._connect()
+        n = conn.execute(
+            'SELECT COUNT(*) FROM questions WHERE family = ? AND level = ? AND skill = ?',
+            (family, level, skill)
+        ).fetchone()[0]
+        conn.close()
+        return n
+
+    def stats(self):
+        """Question counts per role family and level."""
+        conn = self._connect()
+        rows = conn.execute('''
+            SELECT family, level, COUNT(DISTINCT skill) AS skills, COUNT(*) AS questions
+            FROM questions GROUP BY family, level ORDER BY family, level
+        ''').fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def _pick(self, conn, family, level, skill, exclude):
+        placeholders = ", ".join("?" for _ in exclude)
+        query = 'SELECT id, skill, question FROM questions WHERE family = ? AND level = ? AND skill = ?'
+        if exclude:
+            query += f' AND id NOT IN ({placeholders})'
+        query += ' ORDER BY RANDOM() LIMIT 1'
+        return conn.execute(query, (family, level, skill, *exclude)).fetchone()
+
+    def draw(self, job_title, level, skills, exclude=()):
+        """
+        Pick an unused question for this candidate, rotating through their
+        skills, falling back to general questions for the role family and
+        then to the general family. Returns a dict or None.
+        """
+        exclude = list(exclude)
+        family = role_family(job_title)
+        rotation = [s for s in (skills or []) if s in SKILLS]
+        if rotation:
+            start = len(exclude) % len(rotation)
+            rotation = rotation[start:] + rotation[:start]
+
+        candidates = [(family, s) for s in rotation] + [(family, GENERAL_SKILL)]
+        if family != GENERAL_FAMILY:
+            candidates += [(GENERAL_FAMILY, s) for s in rotation] + [(GENERAL_FAMILY, GENERAL_SKILL)]
+
+        conn = self._connect()
+        try:
+            for candidate_family, skill in candidates:
+                row = self._pick(conn, candidate_family, level, skill, exclude)
+                if row is not None:
+                    return dict(row)
+        finally:
+            conn.close()
+        return None
+
+
+_bank = None
+_bank_lock = threading.Lock()
+
+
+def get_question_bank():
+    """Return the process-wide question bank when bank mode is enabled, else None."""
+    global _bank
+    if os.getenv("QUESTION_SOURCE", "llm") != "bank":
+        return None
+    if _bank is None:
+        with _bank_lock:
+            if _bank is None:
+                _bank = QuestionBank()
+    return _bank
+
+
+# ==========================================
+# OFFLINE BUILD
+# ==========================================
+
+def build_bank(coach, bank, families, levels, skills, per_profile, concurrency):
+    """Generate questions for every profile that has fewer than ``per_profile``."""
+    from llm_runtime import get_pool
+
+    profiles = [
+        (family, level, skill)
+        for family in families for level in levels for skill in skills
+        if bank.count(family, level, skill) < per_profile
+    ]
+    print(f"Generating questions for {len(profiles)} profiles...")
+
+    pool = get_pool()
+    in_flight = threading.BoundedSemaphore(concurrency)
+    done = {"profiles": 0, "questions": 0}
+    lock = threading.Lock()
+
+    def finished(profile, future):
+        in_flight.release()
+        try:
+            questions = future.result()
+        except Exception as e:
+            print(f"  {'/'.join(profile)}: failed ({e})")
+            return
+        added = bank.add(*profile, questions)
+        with lock:
+            done["profiles"] += 1
+            done["questions"] += added
+            print(f"  [{done['profiles']}/{len(profiles)}] {'/'.join(profile)}: +{added}")
+
+    futures = []
+    for profile in profiles:
+        in_flight.acquire()
+        future = pool.submit(
+            lambda profile=profile: coach.agenerate_bank_questions(*profile, count=per_profile),
+            timeout=None,
+            lane="background",
+            user="question-bank"
+        )
+        future.add_done_callback(lambda f, profile=profile: finished(profile, f))
+        futures.append(future)
+    for future in futures:
+        try:
+            future.result()
+        except Exception:
+            pass
+    print(f"Done: {done['questions']} new questions across {done['profiles']} profiles.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and inspect the interview question bank.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="generate questions for missing profiles")
+    build.add_argument("--per-profile", type=int, default=10, help="questions per skill/level/family")
+    build.add_argument("--families", nargs="*", default=all_families())
+    build.add_argument("--levels", nargs="*", default=LEVELS)
+    build.add_argument("--skills", nargs="*", default=SKILLS + [GENERAL_SKILL])
+    build.add_argument("--concurrency", type=int, default=8)
+    build.add_argument("--model", default=os.getenv("LLM_MODEL", "gpt-4o-mini"))
+
+    sub.add_parser("stats", help="show question counts per profile")
+    args = parser.parse_args(argv)
+
+    bank = QuestionBank()
+    if args.command == "stats":
+        for row in bank.stats():
+            print(f"{row['family']:<10} {row['level']:<15} {row['skills']:>3} skills {row['questions']:>6} questions")
+        return 0
+
+    from dotenv import load_dotenv
+    from langchain_utils import get_coach
+
+    load_dotenv()
+    coach = get_coach(None, model=args.model)
+    if not coach.api_key:
+        print("No API key configured (set OPENAI_API_KEY or the key of a provider in LLM_PROVIDERS).")
+        return 1
+    build_bank(coach, bank, args.families, args.levels, args.skills, args.per_profile, args.concurrency)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Persistent cache for opening interview questions.
+
+The first turn of an interview depends only on the job setup and resume, so
+replies are stored in SQLite (next to the app database) and served on repeat
+setups. Each setup keeps a small pool of variants so candidates with the same
+setup don't all get the identical question.
+"""
+
+import os
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import threading
+from database import DB_NAME
+
+CACHE_DB = os.path.join(os.path.dirname(DB_NAME), "question_cache.db")
+
+
+def resume_fingerprint(resume_text):
+    """Hash of the resume with whitespace and case normalized."""
+    normalized = " ".join((resume_text or "").lower().split())
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class OpeningQuestionCache:
+    """SQLite-backed pool of opening replies with LRU eviction and a TTL."""
+
+    def __init__(self, path=CACHE_DB, variants=None, ttl=None, max_keys=None):
+        self.path = path
+        self.variants = variants or int(os.getenv("OPENING_CACHE_VARIANTS", "3"))
+        self.ttl = ttl or float(os.getenv("OPENING_CACHE_TTL", str(7 * 24 * 3600)))
+        self.max_keys = max_keys or int(os.getenv("OPENING_CACHE_MAX_KEYS", "5000"))
+        self._filling = set()
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS opening_questions (
+                cache_key TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_opening_key ON opening_questions (cache_key)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_opening_last_used ON opening_questions (last_used)')
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(model, job_desc, resume_text):
+        """Cache key for an interview setup: model, job description and resume fingerprint."""
+        raw = json.dumps([model, job_desc, resume_fingerprint(resume_text)])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key):
+        """Return a random fresh variant for this setup, or None on a miss."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT rowid, response FROM opening_questions WHERE cache_key = ? AND created_at > ?',
+                (key, now - self.ttl)
+            ).fetchall()
+            if not rows:
+                return None
+            rowid, response = random.choice(rows)
+            conn.execute('UPDATE opening_questions SET last_used = ? WHERE rowid = ?', (now, rowid))
+            conn.commit()
+        finally:
+            conn.close()
+
+        data = json.loads(response)
+        data["cached"] = True
+        return data
+
+    def needs_variants(self, key):
+        """True while this setup has fewer fresh variants than the pool size."""
+        conn = self._connect()
+        try:
+            count = conn.execute(
+                'SELECT COUNT(*) FROM opening_questions WHERE cache_key = ? AND created_at > ?',
+                (key, time.time() - self.ttl)
+            ).fetchone()[0]
+        finally:
+            conn.close()
+        return count < self.variants
+
+    def put(self, key, response):
+        """Store one variant, then drop expired rows and least recently used setups."""
+        now = time.time()
+        data = {k: v for k, v in response.items() if k not in ("usage", "cached")}
+        conn = self._connect()
+        try:
+            conn.execute(
+                'INSERT INTO opening_questions (cache_key, response, created_at, last_used) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(data), now, now)
+            )
+            conn.execute('DELETE FROM opening_questions WHERE created_at <= ?', (now - self.ttl,))
+            # Keep each setup's pool at its newest variants
+            conn.execute('''
+                DELETE FROM opening_questions WHERE cache_key = ? AND rowid NOT IN (
+                    SELECT rowid FROM opening_questions WHERE cache_key = ?
+                    ORDER BY created_at DESC LIMIT ?
+                )
+            ''', (key, key, self.variants))
+            conn.execute('''
+                DELETE FROM opening_questions WHERE cache_key IN (
+                    SELECT cache_key FROM opening_questions
+                    GROUP BY cache_key ORDER BY MAX(last_used) DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_keys,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def claim_fill(self, key):
+        """Mark a setup as being topped up; False if another caller already is."""
+        with self._lock:
+            if key in self._filling:
+                return False
+            self._filling.add(key)
+            return True
+
+    def release_fill(self, key):
+        with self._lock:
+            self._filling.discard(key)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_opening_cache():
+    """Return the process-wide opening question cache (None if disabled)."""
+    global _cache
+    if os.getenv("OPENING_CACHE", "1") == "0":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = OpeningQuestionCache()
+    return _cache
@@ -0,0 +1,318 @@
+"""
+Resilience layer for LLM calls: deadlines, jittered retries, request hedging
+and a circuit breaker, with counters for monitoring.
+
+Everything here is asyncio-based and runs on the shared LLM pool loop.
+"""
+
+import os
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+
+try:
+    import openai
+    _RETRYABLE_ERRORS = (
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+except ImportError:
+    _RETRYABLE_ERRORS = ()
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while the circuit breaker is open."""
+
+
+def is_retryable(error):
+    """True for timeouts, connection problems, rate limits and 5xx responses."""
+    if isinstance(error, (TimeoutError, ConnectionError) + _RETRYABLE_ERRORS):
+        return True
+    status = getattr(error, "status_code", None)
+    return status in _RETRYABLE_STATUS
+
+
+def trips_breaker(error):
+    """
+    True for errors that say the provider itself is unhealthy: timeouts,
+    connection problems, 429 and 5xx. Other 4xx responses (a prompt over the
+    context length, a bad request) are the caller's problem and don't count.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError) + _RETRYABLE_ERRORS):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status >= 500 or status in (408, 429))
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures and fails fast for
+    ``reset_timeout`` seconds, then lets a single trial call through.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def acquire(self):
+        """
+        "closed" or "trial" when a call may go ahead, None while open. A
+        trial holds the half-open slot until it records an outcome or
+        calls ``release_trial``.
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return "closed"
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return "trial"
+            return None
+
+    def allow(self):
+        return self.acquire() is not None
+
+    def release_trial(self):
+        """Free the half-open slot without recording an outcome (cancelled or 4xx trial)."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class LatencyWindow:
+    """Rolling window of recent call latencies (seconds)."""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, seconds):
+        self._samples.append(seconds)
+
+    def percentile(self, p):
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+class ResilientCaller:
+    """Wraps LLM coroutines and streams with deadline, retry, hedging and breaker."""
+
+    def __init__(self, timeout=60.0, retries=2, backoff=0.5, max_backoff=8.0,
+                 hedge=False, hedge_percentile=95, hedge_min_delay=1.0, breaker=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyWindow()
+        self.counters = {
+            "calls": 0, "successes": 0, "failures": 0, "retries": 0,
+            "timeouts": 0, "short_circuited": 0, "hedges_fired": 0, "hedges_won": 0,
+        }
+
+    def _count(self, name):
+        self.counters[name] += 1
+
+    def _check_breaker(self):
+        """Returns True when this call is the breaker's half-open trial."""
+        self._count("calls")
+        admitted = self.breaker.acquire()
+        if admitted is None:
+            self._count("short_circuited")
+            raise CircuitOpenError("AI provider is unavailable right now (circuit open)")
+        return admitted == "trial"
+
+    def _failed(self, error):
+        self._count("failures")
+        if isinstance(error, TimeoutError):
+            self._count("timeouts")
+        if trips_breaker(error):
+            self.breaker.record_failure()
+
+    async def _sleep_before_retry(self, attempt, deadline):
+        # Full jitter: uniform in [0, min(max_backoff, backoff * 2^attempt)]
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+        remaining = deadline - time.monotonic()
+        if delay >= remaining:
+            return False
+        self._count("retries")
+        await asyncio.sleep(delay)
+        return True
+
+    def _hedge_delay(self):
+        if not self.hedge or len(self.latency) < 20:
+            return None
+        return max(self.hedge_min_delay, self.latency.percentile(self.hedge_percentile))
+
+    async def _attempt(self, coro_factory):
+        delay = self._hedge_delay()
+        first = asyncio.ensure_future(coro_factory())
+        if delay is None:
+            return await first
+
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                # Primary is slower than usual: race a second request against it
+                self._count("hedges_fired")
+                tasks.append(asyncio.ensure_future(coro_factory()))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self._count("hedges_won")
+                        return task.result()
+            # Every request failed: surface the primary's error
+            return first.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def call(self, coro_factory):
+        """Await ``coro_factory()`` under the deadline, retrying retryable errors."""
+        trial = self._check_breaker()
+        try:
+            deadline = time.monotonic() + self.timeout
+            attempt = 0
+            while True:
+                started = time.monotonic()
+                try:
+                    result = await asyncio.wait_for(self._attempt(coro_factory), deadline - started)
+                except Exception as e:
+                    if isinstance(e, asyncio.TimeoutError):
+                        e = TimeoutError(f"LLM call exceeded its {self.timeout:g}s deadline")
+                    if attempt < self.retries and is_retryable(e) and await self._sleep_before_retry(attempt, deadline):
+                        attempt += 1
+                        continue
+                    self._failed(e)
+                    raise e
+                self.latency.add(time.monotonic() - started)
+                self._count("successes")
+                self.breaker.record_success()
+                return result
+        finally:
+            # A cancelled trial, or one that ended in a 4xx, recorded no
+            # outcome: give the slot back so the next call can try
+            if trial:
+                self.breaker.release_trial()
+
+    async def stream(self, agen_factory):
+        """
+        Iterate ``agen_factory()`` under the deadline. Failures before the
+        first chunk are retried; once output has been yielded they propagate.
+        """
+        trial = self._check_breaker()
+        try:
+            deadline = time.monotonic() + self.timeout
+            attempt = 0
+            while True:
+                started = time.monotonic()
+                yielded = False
+                agen = agen_factory()
+                try:
+                    while True:
+                        remaining = deadline - time.monotonic()
+                        try:
+                            chunk = await asyncio.wait_for(agen.__anext__(), max(remaining, 0))
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError:
+                            raise TimeoutError(f"LLM stream exceeded its {self.timeout:g}s deadline")
+                        yielded = True
+                        yield chunk
+                except Exception as e:
+                    if not yielded and attempt < self.retries and is_retryable(e) \
+                            and await self._sleep_before_retry(attempt, deadline):
+                        attempt += 1
+                        continue
+                    self._failed(e)
+                    raise
+                finally:
+                    try:
+                        await agen.aclose()
+                    except Exception:
+                        pass
+                self.latency.add(time.monotonic() - started)
+                self._count("successes")
+                self.breaker.record_success()
+                return
+        finally:
+            if trial:
+                self.breaker.release_trial()
+
+    def stats(self):
+        """Counters plus breaker state and latency percentiles, for export."""
+        stats = dict(self.counters)
+        stats["breaker_state"] = self.breaker.state
+        stats["latency_p50"] = self.latency.percentile(50)
+        stats["latency_p95"] = self.latency.percentile(95)
+        return stats
+
+
+_callers = {}
+_callers_lock = threading.Lock()
+
+
+def get_resilience(name="default"):
+    """Return the process-wide ResilientCaller for a model/provider, configured from the environment."""
+    with _callers_lock:
+        if name not in _callers:
+            _callers[name] = ResilientCaller(
+                timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+                retries=int(os.getenv("LLM_RETRIES", "2")),
+                hedge=os.getenv("LLM_HEDGE", "0") == "1",
+                hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0")),
+                breaker=CircuitBreaker(
+                    failure_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", "5")),
+                    reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30")),
+                ),
+            )
+        return _callers[name]
+
+
+def resilience_stats():
+    """Stats for every ResilientCaller in the process, keyed by name."""
+    with _callers_lock:
+        return {name: caller.stats() for name, caller in _callers.items()}
@@ -0,0 +1,285 @@
+"""
+Resume PDF ingestion.
+
+Uploaded PDFs are extracted page-parallel in a worker process pool, cleaned
+up (whitespace, running headers/footers, page numbers, doubled lines) and
+cached by the file's SHA-256, so re-uploading the same resume costs one
+hash and one lookup. The compact text is also stored per user.
+
+Before an interview the resume is condensed to the sections most relevant
+to the target role (BM25 against the job title, level and skills) so every
+turn's prompt only carries what the interviewer needs.
+"""
+
+import io
+import os
+import re
+import hashlib
+import threading
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import database as db
+from history import count_tokens
+
+# PDFs with fewer pages than this are extracted inline; spinning up
+# workers costs more than it saves
+PARALLEL_MIN_PAGES = 4
+
+_BULLET = re.compile(r'^[•▪●◦‣⁃·*\-–]+\s*')
+_PAGE_NUMBER = re.compile(r'^(page\s*)?\d+\s*((of|/)\s*\d+)?$', re.I)
+_HYPHEN_BREAK = re.compile(r'(\w)-\n(?=[a-z])')
+_WORD = re.compile(r'[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]')
+_HEADINGS = {
+    "summary", "profile", "objective", "about", "about me", "experience", "work experience",
+    "professional experience", "employment", "employment history", "projects", "personal projects",
+    "skills", "technical skills", "core skills", "education", "certifications", "certificates",
+    "awards", "achievements", "publications", "languages", "interests", "volunteering",
+}
+
+# Suffixes stripped for relevance matching, first match wins; "ss"/"us"/"is"
+# endings are kept ("access", "status", "analysis")
+_SUFFIXES = (("ies", "y"), ("sses", "ss"), ("ing", ""), ("ed", ""),
+             ("ss", "ss"), ("us", "us"), ("is", "is"), ("s", ""))
+
+# Condensation defaults: resumes under the budget are passed through as-is
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "600"))
+SECTION_MAX_TOKENS = 120
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _worker_count():
+    return max(int(os.getenv("RESUME_PDF_WORKERS", str(min(4, os.cpu_count() or 1)))), 1)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=_worker_count())
+    return _executor
+
+
+def _extract_pages(data, start, stop):
+    """Extract text for pages [start, stop) of a PDF (runs in a worker process)."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _page_count(data):
+    from pypdf import PdfReader
+
+    return len(PdfReader(io.BytesIO(data)).pages)
+
+
+def extract_pdf_pages(data):
+    """Return the text of every page, extracted in parallel when worthwhile."""
+    pages = _page_count(data)
+    if pages < PARALLEL_MIN_PAGES:
+        return _extract_pages(data, 0, pages)
+
+    try:
+        executor = _get_executor()
+        step = -(-pages // _worker_count())
+        futures = [
+            executor.submit(_extract_pages, data, start, min(start + step, pages))
+            for start in range(0, pages, step)
+        ]
+        return [text for future in futures for text in future.result()]
+    except Exception as e:
+        # Broken or unavailable pool (e.g. restricted environment): do it inline
+        print(f"Parallel PDF extraction failed, falling back to sequential: {e}")
+        return _extract_pages(data, 0, pages)
+
+
+def normalize_resume_text(pages):
+    """
+    Compact extracted page texts: normalize unicode and whitespace, rejoin
+    hyphenated line breaks, and drop page numbers, headers/footers repeated
+    across pages and lines that repeat the line right before them (an
+    extraction artifact). Lines repeated elsewhere are kept: two roles can
+    share a title and bullets.
+    """
+    page_lines = []
+    for page in pages:
+        text = _HYPHEN_BREAK.sub(r'\1', unicodedata.normalize("NFKC", page or ""))
+        lines = []
+        for line in text.splitlines():
+            line = re.sub(r'\s+', ' ', line).strip()
+            if _BULLET.match(line):
+                line = "- " + _BULLET.sub('', line)
+            lines.append(line)
+        page_lines.append(lines)
+
+    # Page edges repeated on most pages are running headers/footers
+    boilerplate = set()
+    if len(page_lines) > 1:
+        counts = Counter()
+        for lines in page_lines:
+            content = [line for line in lines if line]
+            counts.update({line.casefold() for line in content[:2] + content[-2:]})
+        boilerplate = {line for line, n in counts.items() if n >= max(2, len(page_lines) / 2)}
+
+    output = []
+    for lines in page_lines:
+        for line in lines:
+            key = line.casefold()
+            if not line:
+                if output and output[-1]:
+                    output.append("")
+                continue
+            if key in boilerplate or _PAGE_NUMBER.match(line):
+                continue
+            if output and output[-1].casefold() == key:
+                continue
+            output.append(line)
+    return "\n".join(output).strip()
+
+
+def ingest_resume(data, user_id=None, filename=None):
+    """
+    Extract and normalize an uploaded resume PDF, using the content-hash
+    cache when this exact file has been seen before. Stores the result as
+    the user's current resume. Returns a dict with text, pages and cached.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    cached = db.get_cached_resume(digest)
+    if cached is not None:
+        result = {"text": cached["text"], "pages": cached["pages"], "cached": True}
+    else:
+        pages = extract_pdf_pages(data)
+        text = normalize_resume_text(pages)
+        db.cache_resume(digest, text, len(pages))
+        result = {"text": text, "pages": len(pages), "cached": False}
+
+    if user_id is not None:
+        db.set_user_resume(user_id, digest, filename)
+    result["sha256"] = digest
+    return result
+
+
+# ==========================================
+# RELEVANCE CONDENSATION
+# ==========================================
+
+def _normalize_term(word):
+    """
+    Lowercase and strip common plural/verb suffixes so "Engineers" and
+    "engineering" match "engineer". Short words and tech tokens such as
+    "c++" or "node.js" are left alone.
+    """
+    word = word.lower()
+    if len(word) <= 4 or not word.isalpha():
+        return word
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+def _tokenize(text):
+    return [_normalize_term(word) for word in _WORD.findall(text.lower())]
+
+
+def _is_heading(line):
+    stripped = line.strip().rstrip(":").strip()
+    if not stripped or len(stripped) > 40 or stripped.startswith("- "):
+        return False
+    return stripped.lower() in _HEADINGS or (stripped.isupper() and len(stripped.split()) <= 4)
+
+
+def split_sections(text):
+    """
+    Split a resume into rankable chunks: one per heading or paragraph,
+    with long ones cut into runs of lines under SECTION_MAX_TOKENS.
+    Each chunk is prefixed with its heading for context.
+    """
+    blocks = []
+    heading = None
+    current = []
+
+    def close():
+        if current:
+            blocks.append((heading, current[:]))
+            current.clear()
+
+    for line in text.splitlines():
+        if _is_heading(line):
+            close()
+            heading = line.strip().rstrip(":")
+        elif not line.strip():
+            close()
+        else:
+            current.append(line)
+    close()
+
+    sections = []
+    for block_heading, lines in blocks:
+        chunk, size = [], 0
+        for line in lines:
+            tokens = count_tokens(line)
+            if chunk and size + tokens > SECTION_MAX_TOKENS:
+                sections.append((block_heading, chunk))
+                chunk, size = [], 0
+            chunk.append(line)
+            size += tokens
+        sections.append((block_heading, chunk))
+    return [
+        (f"{h}:\n" if h else "") + "\n".join(lines)
+        for h, lines in sections
+    ]
+
+
+def bm25_scores(documents, query_terms, k1=1.5, b=0.75):
+    """BM25 score of each document against the query terms, vectorized over documents."""
+    terms = sorted({_normalize_term(term) for term in query_terms})
+    if not documents or not terms:
+        return np.zeros(len(documents))
+    index = {term: i for i, term in enumerate(terms)}
+
+    tf = np.zeros((len(documents), len(terms)))
+    lengths = np.zeros(len(documents))
+    for d, doc in enumerate(documents):
+        words = _tokenize(doc)
+        lengths[d] = len(words)
+        for word in words:
+            i = index.get(word)
+            if i is not None:
+                tf[d, i] += 1
+
+    df = (tf > 0).sum(axis=0)
+    idf = np.log((len(documents) - df + 0.5) / (df + 0.5) + 1.0)
+    norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1.0))
+    return (idf * tf * (k1 + 1) / (tf + norm[:, None])).sum(axis=1)
+
+
+def condense_resume(text, job_title="", level="", skills=(), token_budget=None):
+    """
+    Keep the resume sections most relevant to the role, in their original
+    order, within ``token_budget`` tokens. Short resumes are returned as-is.
+    """
+    budget = RESUME_TOKEN_BUDGET if token_budget is None else token_budget
+    if not text or count_tokens(text) <= budget:
+        return text
+
+    sections = split_sections(text)
+    query = _tokenize(" ".join([job_title or "", level or "", *(skills or [])]))
+    scores = bm25_scores(sections, query)
+    # Highest score first; ties keep resume order so the summary/latest role
+    # wins, and sections matching nothing fill the leftover budget in order
+    ranked = np.lexsort((np.arange(len(sections)), -scores))
+
+    kept, used = [], 0
+    for i in ranked:
+        cost = count_tokens(sections[i])
+        if used + cost > budget:
+            continue
+        kept.append(i)
+        used += cost
+    return "\n\n".join(sections[i] for i in sorted(kept))
@@ -0,0 +1,90 @@
+"""
+Per-call-type model routing.
+
+Each kind of LLM call takes a route with its own model and temperature, so
+the hot per-turn path can run on the fastest model while the final verdict
+stays on a stronger one. Routes default to the coach's configured model
+and are overridden from the environment:
+
+    LLM_MODEL_FOLLOWUP=gpt-4o-mini
+    LLM_MODEL_VERDICT=gpt-4o
+    LLM_TEMPERATURE_VERDICT=0.2
+
+Each route is served by one backend per configured provider (see
+providers.py). Latency and errors are tracked per route for monitoring.
+"""
+
+import os
+import threading
+from collections import namedtuple
+from resilience import LatencyWindow
+
+ROUTES = (
+    "opening",        # first question of an interview
+    "followup",       # every interviewer turn before the last answer
+    "verdict",        # the turn after the last answer (final score and verdict)
+    "answer_score",   # background grading of each answer
+    "report",         # grading done while the Results page waits
+    "summary",        # rolling history notes
+    "bank",           # offline question-bank generation
+    "grade",          # offline regrading of stored interviews
+)
+
+# ``model`` is the primary provider's model; ``backends`` is a ProviderFailover
+ModelRoute = namedtuple("ModelRoute", ["name", "model", "temperature", "backends"])
+
+
+def route_settings(route, model, temperature):
+    """(model, temperature) for a route, falling back to the given defaults."""
+    suffix = route.upper()
+    return (
+        os.getenv(f"LLM_MODEL_{suffix}") or model,
+        float(os.getenv(f"LLM_TEMPERATURE_{suffix}", temperature))
+    )
+
+
+class RouteStats:
+    """Rolling latency and error counts per route."""
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, model, seconds, error=None, provider=None):
+        with self._lock:
+            stats = self._routes.setdefault(route, {
+                "provider": provider, "model": model, "calls": 0, "errors": 0, "latency": LatencyWindow()
+            })
+            stats["provider"] = provider
+            stats["model"] = model
+            stats["calls"] += 1
+            if error:
+                stats["errors"] += 1
+            if seconds is not None and not error:
+                stats["latency"].add(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                route: {
+                    "provider": stats["provider"],
+                    "model": stats["model"],
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "latency_p50": stats["latency"].percentile(50),
+                    "latency_p95": stats["latency"].percentile(95),
+                }
+                for route, stats in self._routes.items()
+            }
+
+
+_route_stats = RouteStats()
+
+
+def record_route(route, model, seconds, error=None, provider=None):
+    _route_stats.record(route, model, seconds, error, provider)
+
+
+def route_stats():
+    """Per-route provider and model (of the latest call), call/error counts and latency percentiles (seconds)."""
+    return _route_stats.snapshot()
@@ -0,0 +1,170 @@
+"""
+Fair-share admission control for LLM requests.
+
+Sits in front of every call on the shared LLM pool: enforces the provider's
+requests-per-minute and tokens-per-minute limits with token buckets, caps
+concurrency, serves interactive interview turns before background work
+(summaries, feedback, grading), and round-robins between users within a
+lane so one busy cohort can't starve everyone else.
+"""
+
+import time
+import asyncio
+from collections import OrderedDict, deque
+
+LANES = ("interactive", "background")
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units per minute; ``per_minute <= 0`` means unlimited."""
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self):
+        return self.per_minute <= 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.per_minute / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until ``amount`` units are available (0 if now)."""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.per_minute
+
+    def take(self, amount):
+        """Consume units; negative amounts refund. The level may go below zero."""
+        if self.unlimited:
+            return
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+    def available(self):
+        if self.unlimited:
+            return None
+        self._refill()
+        return self.level
+
+
+class FairScheduler:
+    """
+    Priority lanes with per-user round robin, gated by concurrency and
+    RPM/TPM token buckets. Lives on the shared LLM pool loop.
+    """
+
+    def __init__(self, max_concurrency=16, rpm=0, tpm=0, max_background_wait=30.0):
+        self.max_concurrency = max_concurrency
+        self.max_background_wait = max_background_wait
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.running = 0
+        self._lanes = {lane: OrderedDict() for lane in LANES}
+        self._waits = {lane: deque(maxlen=500) for lane in LANES}
+        self._wakeup = None
+        self._dispatcher = None
+
+    async def acquire(self, user=None, lane="interactive", tokens=0):
+        """Wait for this request's turn; pair every successful acquire with release()."""
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None:
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+
+        lane = lane if lane in self._lanes else "interactive"
+        users = self._lanes[lane]
+        queue = users.setdefault(user or "anonymous", deque())
+        waiter = (loop.create_future(), tokens, time.monotonic())
+        queue.append(waiter)
+        self._wakeup.set()
+        try:
+            await waiter[0]
+        except asyncio.CancelledError:
+            if waiter[0].done() and not waiter[0].cancelled():
+                # Granted just as we were cancelled: hand the slot back
+                self.release()
+            elif waiter in queue:
+                queue.remove(waiter)
+                if not queue:
+                    users.pop(user or "anonymous", None)
+            raise
+
+    def release(self):
+        self.running -= 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def adjust_tokens(self, delta):
+        """Correct the TPM bucket once a call's real token usage is known."""
+        self.tokens.take(delta)
+
+    def _pick_lane(self):
+        background = self._lanes["background"]
+        if background:
+            oldest = min(q[0][2] for q in background.values())
+            # Aging: background work never waits forever behind a busy lane
+            if time.monotonic() - oldest > self.max_background_wait:
+                return "background"
+        for lane in LANES:
+            if self._lanes[lane]:
+                return lane
+        return None
+
+    async def _dispatch(self):
+        while True:
+            lane = self._pick_lane()
+            if lane is None or self.running >= self.max_concurrency:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            users = self._lanes[lane]
+            user, queue = next(iter(users.items()))
+            future, tokens, enqueued = queue[0]
+            if future.cancelled():
+                queue.popleft()
+                if not queue:
+                    del users[user]
+                continue
+
+            delay = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            queue.popleft()
+            if queue:
+                users.move_to_end(user)
+            else:
+                del users[user]
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.running += 1
+            self._waits[lane].append(time.monotonic() - enqueued)
+            future.set_result(None)
+
+    def stats(self):
+        """Queue depth and recent wait times per lane, plus bucket levels."""
+        stats = {
+            "running": self.running,
+            "max_concurrency": self.max_concurrency,
+            "rpm_available": self.requests.available(),
+            "tpm_available": self.tokens.available(),
+        }
+        for lane in LANES:
+            waits = sorted(self._waits[lane])
+            stats[f"{lane}_queued"] = sum(len(q) for q in self._lanes[lane].values())
+            stats[f"{lane}_users_waiting"] = len(self._lanes[lane])
+            stats[f"{lane}_wait_p50_ms"] = waits[len(waits) // 2] * 1000 if waits else None
+            stats[f"{lane}_wait_p95_ms"] = waits[min(int(len(waits) * 0.95), len(waits) - 1)] * 1000 if waits else None
+        return stats
@@ -0,0 +1,134 @@
+import os
+import sys
+import time
+import asyncio
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def make_caller(threshold=2, reset=0.05):
+    return ResilientCaller(timeout=5.0, retries=0, breaker=CircuitBreaker(threshold, reset))
+
+
+def fail_with(error):
+    async def invoke():
+        raise error
+    return invoke
+
+
+async def ok():
+    return "ok"
+
+
+def trip(caller):
+    for _ in range(caller.breaker.failure_threshold):
+        with pytest.raises(StatusError):
+            asyncio.run(caller.call(fail_with(StatusError(503))))
+    assert caller.breaker.state == "open"
+
+
+def wait_half_open(caller):
+    time.sleep(caller.breaker.reset_timeout + 0.01)
+    assert caller.breaker.state == "half_open"
+
+
+def test_client_errors_do_not_trip_breaker():
+    caller = make_caller()
+    for _ in range(5):
+        with pytest.raises(StatusError):
+            asyncio.run(caller.call(fail_with(StatusError(400))))
+    assert caller.breaker.state == "closed"
+    assert caller.counters["failures"] == 5
+
+
+def test_server_errors_and_rate_limits_trip_breaker():
+    caller = make_caller()
+    for status in (429, 500):
+        with pytest.raises(StatusError):
+            asyncio.run(caller.call(fail_with(StatusError(status))))
+    assert caller.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(caller.call(ok))
+
+
+def test_breaker_recovers_after_successful_trial():
+    caller = make_caller()
+    trip(caller)
+    wait_half_open(caller)
+    assert asyncio.run(caller.call(ok)) == "ok"
+    assert caller.breaker.state == "closed"
+    assert asyncio.run(caller.call(ok)) == "ok"
+
+
+def test_failed_trial_reopens_breaker():
+    caller = make_caller()
+    trip(caller)
+    wait_half_open(caller)
+    with pytest.raises(StatusError):
+        asyncio.run(caller.call(fail_with(StatusError(502))))
+    assert caller.breaker.state == "open"
+
+
+def test_cancelled_trial_releases_half_open_slot():
+    caller = make_caller()
+    trip(caller)
+    wait_half_open(caller)
+
+    async def cancel_trial():
+        task = asyncio.ensure_future(caller.call(lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0.01)
+        # The trial holds the slot: a concurrent call is short-circuited
+        with pytest.raises(CircuitOpenError):
+            await caller.call(ok)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+    assert caller.breaker.state == "half_open"
+    assert asyncio.run(caller.call(ok)) == "ok"
+    assert caller.breaker.state == "closed"
+
+
+def test_client_error_trial_releases_half_open_slot():
+    caller = make_caller()
+    trip(caller)
+    wait_half_open(caller)
+    with pytest.raises(StatusError):
+        asyncio.run(caller.call(fail_with(StatusError(400))))
+    assert asyncio.run(caller.call(ok)) == "ok"
+    assert caller.breaker.state == "closed"
+
+
+def test_abandoned_stream_trial_releases_half_open_slot():
+    caller = make_caller()
+    trip(caller)
+    wait_half_open(caller)
+
+    async def chunks():
+        for chunk in ("a", "b", "c"):
+            yield chunk
+
+    async def read_first_chunk():
+        stream = caller.stream(chunks)
+        assert await stream.__anext__() == "a"
+        # Consumer walks away mid-stream (GeneratorExit inside the trial)
+        await stream.aclose()
+
+    asyncio.run(read_first_chunk())
+    assert caller.breaker.state == "half_open"
+
+    async def read_all():
+        return [chunk async for chunk in caller.stream(chunks)]
+
+    assert asyncio.run(read_all()) == ["a", "b", "c"]
+    assert caller.breaker.state == "closed"
@@ -106,9 +106,10 @@ def page_login_signup():
             with col1:
                 if st.button("🚀 Login", key="btn_login"):
                     if email and password:
-                        if db.verify_user(email, password):
+                        user_id = db.verify_user(email, password)
+                        if user_id:
                             st.session_state.authenticated = True
-                            st.session_state.user_data = {'name': email.split('@')[0], 'email': email}
+                            st.session_state.user_data = {'id': user_id, 'name': email.split('@')[0], 'email': email}
                             st.session_state.current_view = 'setup'
                             st.success("✅ Login successful! Redirecting...")
                             st.balloons()
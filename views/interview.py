@@ -1,5 +1,68 @@
-import streamlit as st
 import time
+import streamlit as st
+import database as db
+from history import InterviewHistory
+from feedback import AnswerEvaluations
+from views.setup import take_opening
+
+def _get_history(coach):
+    """Token-budgeted history for this interview, rebuilt for another interview or a reset transcript."""
+    session_id = st.session_state.interview_data.get("session_id")
+    messages = st.session_state.messages[:-1]
+    current = st.session_state.get("interview_history")
+    if current and current[0] == session_id and len(current[1]) == len(messages):
+        return current[1]
+    history = InterviewHistory(coach.asummarize_history)
+    for message in messages:
+        history.append(message["role"], message["content"])
+    st.session_state.interview_history = (session_id, history)
+    return history
+
+def get_answer_evaluations():
+    """Background answer evaluations for the current interview."""
+    session_id = st.session_state.interview_data.get("session_id")
+    evaluations = st.session_state.get("answer_evaluations")
+    if evaluations is None or evaluations.session_id != session_id:
+        evaluations = AnswerEvaluations(session_id)
+        st.session_state.answer_evaluations = evaluations
+    return evaluations
+
+def _track_bank_question(response):
+    """Remember which question-bank questions this interview has already asked."""
+    if response.get("question_id") is not None:
+        st.session_state.interview_data.setdefault("bank_asked", []).append(response["question_id"])
+
+def _add_message(message, latency_ms=None):
+    """Append a message to the transcript and persist it as this interview's next turn."""
+    seq = len(st.session_state.messages)
+    st.session_state.messages.append(message)
+    session_id = st.session_state.interview_data.get("session_id")
+    if session_id:
+        db.record_turn(session_id, seq, message, latency_ms)
+
+def _finish_interview():
+    """Store the interview in the user's history (once); its transcript is already in turns."""
+    data = st.session_state.interview_data
+    session_id = data.get("session_id")
+    if not session_id or st.session_state.get("interview_saved") == session_id:
+        return
+    final = next((m for m in reversed(st.session_state.messages) if m["role"] == "assistant"), {})
+    db.save_interview(data.get("user_id"), data.get("job_title", ""), None,
+                      final.get("final_score"), final.get("verdict"), session_id=session_id)
+    st.session_state.interview_saved = session_id
+
+def _pause_interview():
+    """Mark this interview paused, wait for its turns to be committed and return to setup to resume later."""
+    session_id = st.session_state.interview_data.get("session_id")
+    if session_id:
+        db.set_interview_status(session_id, "paused")
+        db.flush_writes()
+    st.session_state.messages = []
+    st.session_state.interview_data = {}
+    st.session_state.interview_scores = {}
+    st.session_state.interview_complete = False
+    st.session_state.pop("interview_history", None)
+    st.session_state.current_view = "setup"
 
 def render_interview_view():
     """Modern Interview page with enhanced UI and real-time feedback."""
@@ -66,7 +129,7 @@ def render_interview_view():
     if not st.session_state.interview_data:
         st.warning("⚠️ Please complete job setup first")
         if st.button("← Go to Setup"):
-            st.session_state.dash_view = "setup"
+            st.session_state.current_view = "setup"
             st.rerun()
         return
     
@@ -99,6 +162,29 @@ def render_interview_view():
         </div>
     """, unsafe_allow_html=True)
     
+    # Opening question, usually already generated while setup was filled in
+    if not st.session_state.messages:
+        future = take_opening(st.session_state.interview_data)
+        started = time.perf_counter()
+        with st.spinner("🤔 Interviewer is preparing the first question..."):
+            if future is not None:
+                opening = future.result()
+            else:
+                # No prefetch to wait for (pool saturated or setup changed): ask now
+                opening = st.session_state.coach.opening_question(st.session_state.interview_data)
+        if opening.get("error"):
+            st.error(opening.get("message"))
+        else:
+            _track_bank_question(opening)
+            _add_message({
+                "role": "assistant",
+                "content": opening.get("message", ""),
+                "status": opening.get("status"),
+                "score": None,
+                "question_id": opening.get("question_id"),
+                "usage": opening.get("usage")
+            }, latency_ms=(time.perf_counter() - started) * 1000)
+    
     # Chat Display
     st.markdown('<div class="chat-container">', unsafe_allow_html=True)
     
@@ -124,6 +210,9 @@ def render_interview_view():
                     </div>
                 """, unsafe_allow_html=True)
     
+    # Filled in while the next reply is streaming
+    live_turn = st.container()
+    
     st.markdown('</div>', unsafe_allow_html=True)
     
     st.divider()
@@ -142,16 +231,57 @@ def render_interview_view():
     with col1:
         if st.button("✅ Submit Answer", use_container_width=True):
             if user_input.strip():
-                st.session_state.messages.append({"role": "user", "content": user_input})
+                started = time.perf_counter()
+                _add_message({"role": "user", "content": user_input})
                 
-                with st.spinner("🤔 Interviewer is thinking..."):
-                    time.sleep(1)  # Simulate processing
+                with live_turn:
+                    st.markdown(f"""
+                        <div class="message-user">
+                            <strong>You:</strong><br>{user_input}
+                        </div>
+                    """, unsafe_allow_html=True)
+                    reply_box = st.empty()
+                    reply_box.caption("🤔 Interviewer is thinking...")
+                    
                     coach = st.session_state.coach
-                    response = coach.ask_question(
+                    # Grade this answer in the background while the next question streams
+                    get_answer_evaluations().ensure(coach, st.session_state.messages, st.session_state.interview_data)
+                    history = _get_history(coach)
+                    stream = coach.stream_question(
                         user_input,
-                        st.session_state.interview_data
+                        st.session_state.interview_data,
+                        history=history.prompt_history(),
+                        answer_number=len([m for m in st.session_state.messages if m['role'] == 'user'])
                     )
-                    st.session_state.messages.append({"role": "assistant", "content": response})
+                    shown = ""
+                    for delta in stream:
+                        shown += delta
+                        reply_box.markdown(f"""
+                            <div class="message-ai">
+                                <strong>🤖 Interviewer:</strong><br>{shown}
+                            </div>
+                        """, unsafe_allow_html=True)
+                
+                response = stream.result
+                _track_bank_question(response)
+                history.append("user", user_input)
+                history.append("assistant", response.get("message", ""))
+                _add_message({
+                    "role": "assistant",
+                    "content": response.get("message", "Unable to get response"),
+                    "status": response.get("status"),
+                    "score": response.get("score"),
+                    "final_score": response.get("final_score"),
+                    "verdict": response.get("verdict"),
+                    "question_id": response.get("question_id"),
+                    "usage": response.get("usage")
+                }, latency_ms=(time.perf_counter() - started) * 1000)
+                if response.get("score") is not None:
+                    answered = len([m for m in st.session_state.messages if m['role'] == 'user'])
+                    st.session_state.interview_scores[answered] = response["score"]
+                if response.get("status") == "finished":
+                    st.session_state.interview_complete = True
+                    _finish_interview()
                 
                 st.success("✅ Response recorded!")
                 st.rerun()
@@ -160,16 +290,32 @@ def render_interview_view():
     
     with col2:
         if st.button("⏸ Pause", use_container_width=True):
-            st.info("💾 Your progress has been saved. You can continue later.")
+            if st.session_state.messages:
+                _pause_interview()
+                st.rerun()
+            else:
+                st.info("Nothing to save yet: the interview hasn't started.")
     
     with col3:
         if st.button("⏹ End", use_container_width=True):
             if len(st.session_state.messages) > 0:
-                st.session_state.dash_view = "result"
+                _finish_interview()
+                st.session_state.current_view = "result"
                 st.rerun()
             else:
                 st.warning("⚠️ Please answer at least one question before finishing")
     
+    # Prompt cache report (cached vs. uncached prompt tokens per turn)
+    usage_rows = [m["usage"] for m in st.session_state.messages if m.get("usage")]
+    if usage_rows:
+        with st.expander("🧮 Token Usage"):
+            for turn, usage in enumerate(usage_rows, 1):
+                st.caption(
+                    f"Turn {turn}: {usage['prompt_tokens']} prompt tokens "
+                    f"({usage['cached_tokens']} cached, {usage['uncached_tokens']} uncached), "
+                    f"{usage['completion_tokens']} completion"
+                )
+    
     # Tips Section
     with st.expander("💡 Interview Tips"):
         st.markdown("""
@@ -1,4 +1,46 @@
 import streamlit as st
+import database as db
+from views.interview import get_answer_evaluations
+
+def _get_report():
+    """Feedback report for the current transcript, assembled once per transcript."""
+    key = (st.session_state.interview_data.get("session_id"), len(st.session_state.messages))
+    current = st.session_state.get("feedback_report")
+    if current and current[0] == key:
+        return current[1]
+    with st.spinner("📊 Putting your report together..."):
+        report = st.session_state.coach.get_feedback(
+            st.session_state.messages,
+            st.session_state.interview_data,
+            get_answer_evaluations()
+        )
+    st.session_state.feedback_report = (key, report)
+    return report
+
+def _get_duration():
+    """Minutes the interview took by its recorded turn times, or None; looked up once per transcript."""
+    session_id = st.session_state.interview_data.get("session_id")
+    key = (session_id, len(st.session_state.messages))
+    current = st.session_state.get("interview_duration")
+    if current and current[0] == key:
+        return current[1]
+    minutes = None
+    if session_id:
+        # The last turns may still be queued for the writer
+        db.flush_writes(timeout=2.0)
+        seconds = db.get_interview_duration(session_id)
+        minutes = round(seconds / 60) if seconds is not None else None
+    st.session_state.interview_duration = (key, minutes)
+    return minutes
+
+def _score_label(score):
+    if score is None:
+        return "Not scored yet"
+    if score >= 80:
+        return "Outstanding Performance!"
+    if score >= 60:
+        return "Solid Performance"
+    return "Keep Practicing"
 
 def render_result_view():
     """Modern Results page with detailed performance analysis."""
@@ -82,7 +124,7 @@ def render_result_view():
         if st.button("← Start New Interview"):
             st.session_state.messages = []
             st.session_state.interview_data = {}
-            st.session_state.dash_view = "setup"
+            st.session_state.current_view = "setup"
             st.rerun()
         return
     
@@ -95,13 +137,17 @@ def render_result_view():
     """, unsafe_allow_html=True)
     
     # Score Card
-    user_responses = len([m for m in st.session_state.messages if m["role"] == "user"])
+    report = _get_report()
+    user_responses = report["answered"]
+    overall = report["overall_score"]
+    verdict_html = f'<div class="verdict-badge">{report["verdict"]}</div>' if report["verdict"] else ""
     
     st.markdown(f"""
         <div class="score-card">
             <div style="color: #94a3b8; font-size: 1.1rem;">Overall Score</div>
-            <div class="score-value">{85 + (user_responses * 2)}/100</div>
-            <div style="color: #10b981; font-weight: 600; font-size: 1.1rem;">Outstanding Performance!</div>
+            <div class="score-value">{overall if overall is not None else "--"}/100</div>
+            <div style="color: #10b981; font-weight: 600; font-size: 1.1rem;">{_score_label(overall)}</div>
+            {verdict_html}
         </div>
     """, unsafe_allow_html=True)
     
@@ -112,9 +158,11 @@ def render_result_view():
     with col2:
         st.metric("✍️ Responses", user_responses, "given")
     with col3:
-        st.metric("⏱️ Duration", f"{user_responses * 2} min", "approx")
+        minutes = _get_duration()
+        st.metric("⏱️ Duration", f"{max(minutes, 1)} min" if minutes is not None else "--", "active time")
     with col4:
-        st.metric("🎯 Accuracy", f"{90 + user_responses}%", "avg")
+        average = report["average_score"]
+        st.metric("🎯 Avg Answer", f"{average:.1f}/10" if average is not None else "--", f"{report['scored']} graded")
     
     st.divider()
     
@@ -126,16 +174,8 @@ def render_result_view():
         st.markdown('<div class="analysis-card">', unsafe_allow_html=True)
         st.markdown("### 💪 Strengths")
         
-        strengths = [
-            "✅ Clear communication and articulation",
-            "✅ Good problem-solving approach",
-            "✅ Provided relevant examples",
-            "✅ Demonstrated technical knowledge",
-            "✅ Asked thoughtful clarifying questions"
-        ]
-        
-        for strength in strengths[:user_responses]:
-            st.markdown(f"- {strength}")
+        for strength in report["strengths"] or ["No strengths recorded yet"]:
+            st.markdown(f"- ✅ {strength}")
         
         st.markdown('</div>', unsafe_allow_html=True)
         
@@ -143,16 +183,21 @@ def render_result_view():
         st.markdown('<div class="analysis-card">', unsafe_allow_html=True)
         st.markdown("### 🎯 Areas for Improvement")
         
-        improvements = [
-            "📌 Practice concise explanations for complex topics",
-            "📌 Include more specific metrics in examples",
-            "📌 Discuss trade-offs more explicitly",
-            "📌 Share your thought process more openly",
-            "📌 Practice explaining edge cases"
-        ]
+        for improvement in report["improvements"] or ["No improvements recorded yet"]:
+            st.markdown(f"- 📌 {improvement}")
         
-        for improvement in improvements[:3]:
-            st.markdown(f"- {improvement}")
+        st.markdown('</div>', unsafe_allow_html=True)
+        
+        # Per-answer breakdown
+        st.markdown('<div class="analysis-card">', unsafe_allow_html=True)
+        st.markdown("### 📋 Answer by Answer")
+        
+        for answer in report["answers"]:
+            score = f"{answer['score']:g}/10" if answer.get("score") is not None else "not scored"
+            with st.expander(f"Answer #{answer['number']} — {score}"):
+                st.markdown(answer.get("summary") or "_No evaluation available._")
+                if answer.get("error"):
+                    st.caption(f"⚠️ Evaluation failed: {answer['error']}")
         
         st.markdown('</div>', unsafe_allow_html=True)
     
@@ -220,49 +265,13 @@ def render_result_view():
         # Download Report
         st.markdown("### 📥 Download Your Report")
         
-        # Generate report text
-        report = f"""
-INTERVIEW PERFORMANCE REPORT
-{'='*50}
-
-Position: {st.session_state.interview_data.get('job_title', 'N/A')}
-Company: {st.session_state.interview_data.get('company', 'N/A')}
-Level: {st.session_state.interview_data.get('level', 'N/A')}
-
-PERFORMANCE METRICS
-{'='*50}
-Overall Score: {85 + (user_responses * 2)}/100
-Questions Answered: {user_responses}
-Completion Rate: 100%
-Average Answer Quality: 8.5/10
-
-STRENGTHS
-{'='*50}
-✓ Clear communication
-✓ Problem-solving approach
-✓ Technical knowledge
-✓ Example usage
-
-AREAS FOR IMPROVEMENT
-{'='*50}
-• Practice concise explanations
-• Include more metrics
-• Discuss trade-offs
-• Share thought process
-
-RECOMMENDATIONS
-{'='*50}
-1. Continue system design practice
-2. Work on behavioral stories
-3. Mock interview regularly
-4. Review technical fundamentals
-        """
+        report_text = report["text"]
         
         col1, col2 = st.columns(2)
         with col1:
             st.download_button(
                 label="📄 Download as Text",
-                data=report,
+                data=report_text,
                 file_name="interview_report.txt",
                 mime="text/plain",
                 use_container_width=True
@@ -279,7 +288,7 @@ RECOMMENDATIONS
         if st.button("🚀 Try Another Interview", use_container_width=True):
             st.session_state.messages = []
             st.session_state.interview_data = {}
-            st.session_state.dash_view = "setup"
+            st.session_state.current_view = "setup"
             st.balloons()
             st.rerun()
     
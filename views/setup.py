@@ -1,4 +1,103 @@
 import streamlit as st
+import uuid
+import database as db
+from question_bank import SKILLS, LEVELS
+from resume_utils import ingest_resume, condense_resume
+
+def _opening_key(interview_data):
+    fields = tuple(interview_data.get(k, "") for k in ("job_title", "company", "level", "resume_context"))
+    # Skills steer resume condensation, so they change the opening prompt too
+    return fields + (tuple(interview_data.get("skills") or ()),)
+
+def prefetch_opening(interview_data):
+    """
+    Start generating the opening question for this setup in the background.
+    
+    The future is kept on the session; a prefetch for an outdated setup is
+    cancelled and replaced.
+    """
+    key = _opening_key(interview_data)
+    current = st.session_state.get("opening_prefetch")
+    if current and current[0] == key:
+        return current[1]
+    if current:
+        current[1].cancel()
+    
+    future = st.session_state.coach.prefetch_opening(interview_data)
+    st.session_state.opening_prefetch = (key, future) if future else None
+    return future
+
+def take_opening(interview_data):
+    """Pop the prefetched opening question future for this setup, starting one if needed."""
+    future = prefetch_opening(interview_data)
+    st.session_state.opening_prefetch = None
+    return future
+
+def _resume_upload(uploaded, user_id):
+    """Extracted text for an uploaded resume PDF, processed once per upload."""
+    current = st.session_state.get("resume_upload")
+    if current and current[0] == uploaded.file_id:
+        return current[1]
+    try:
+        with st.spinner("📄 Reading your resume..."):
+            result = ingest_resume(uploaded.getvalue(), user_id=user_id, filename=uploaded.name)
+    except Exception as e:
+        st.error(f"❌ Could not read this PDF: {e}")
+        return None
+    st.session_state.resume_upload = (uploaded.file_id, result)
+    return result
+
+def _resume_context(resume, job_title, level, skills):
+    """Role-relevant resume excerpt sent with every turn, computed once per setup."""
+    key = (resume, job_title, level, tuple(skills))
+    current = st.session_state.get("resume_context")
+    if current and current[0] == key:
+        return current[1]
+    context = condense_resume(resume, job_title, level, skills)
+    st.session_state.resume_context = (key, context)
+    return context
+
+def _resume_interview(session_id, user_id):
+    """Restore a stored interview into the session and switch to the interview page."""
+    session = db.load_interview_session(session_id, user_id)
+    if session is None:
+        st.error("❌ That interview could not be found.")
+        return
+    messages = session["messages"]
+    interview_data = session["setup"]
+    # Bank questions already asked, so a resumed interview doesn't repeat them
+    interview_data["bank_asked"] = [m["question_id"] for m in messages if m.get("question_id") is not None]
+    scores = {}
+    answered = 0
+    for message in messages:
+        if message["role"] == "user":
+            answered += 1
+        elif message.get("score") is not None and answered:
+            scores[answered] = message["score"]
+    st.session_state.interview_data = interview_data
+    st.session_state.messages = messages
+    st.session_state.interview_scores = scores
+    st.session_state.interview_complete = any(m.get("status") == "finished" for m in messages)
+    st.session_state.opening_prefetch = None
+    st.session_state.pop("interview_history", None)
+    db.set_interview_status(session_id, "active")
+    st.session_state.current_view = "interview"
+    st.rerun()
+
+def _resumable_interviews(user_id):
+    """Offer to resume the user's paused or interrupted interviews."""
+    if user_id is None:
+        return
+    for session in db.get_resumable_interviews(user_id, limit=3):
+        setup = session["setup"]
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            state = "paused" if session["status"] == "paused" else "interrupted"
+            st.info(f"⏯️ {setup.get('job_title') or session['role']} at {setup.get('company') or 'N/A'}: "
+                    f"{session['answers']} answers so far ({state})")
+        with col2:
+            if st.button("▶ Resume", use_container_width=True, key=f"resume_{session['session_id']}"):
+                _resume_interview(session["session_id"], user_id)
 
 def render_home_view():
     """Modern Job Setup page with improved UI and animations."""
@@ -66,6 +165,8 @@ def render_home_view():
         </div>
     """, unsafe_allow_html=True)
     
+    _resumable_interviews(st.session_state.user_data.get("id"))
+    
     # Progress Indicator
     st.markdown("""
         <div class="progress-steps">
@@ -109,7 +210,7 @@ def render_home_view():
     with col2:
         level = st.selectbox(
             "Seniority Level",
-            ["Junior", "Mid-Level", "Senior", "Lead/Principal"],
+            LEVELS,
             help="Your target career level"
         )
     
@@ -142,17 +243,9 @@ def render_home_view():
     st.markdown('<div class="form-section">', unsafe_allow_html=True)
     st.markdown('<div class="section-title">🎯 Key Skills</div>', unsafe_allow_html=True)
     
-    all_skills = [
-        "Python", "JavaScript", "TypeScript", "Java", "C++", "Go", "Rust",
-        "React", "Vue", "Angular", "Node.js", "Django", "FastAPI",
-        "AWS", "GCP", "Azure", "Docker", "Kubernetes", "Terraform",
-        "SQL", "MongoDB", "Redis", "PostgreSQL",
-        "System Design", "Microservices", "REST API", "GraphQL"
-    ]
-    
     skills = st.multiselect(
         "Select your core skills",
-        all_skills,
+        SKILLS,
         help="Choose skills relevant to the position",
         max_selections=10
     )
@@ -171,6 +264,24 @@ def render_home_view():
     st.markdown('<div class="form-section">', unsafe_allow_html=True)
     st.markdown('<div class="section-title">📄 Background</div>', unsafe_allow_html=True)
     
+    user_id = st.session_state.user_data.get("id")
+    uploaded = st.file_uploader(
+        "Upload your resume (PDF)",
+        type=["pdf"],
+        help="We extract the text once and reuse it for your interviews"
+    )
+    resume_pdf_text = ""
+    if uploaded is not None:
+        upload = _resume_upload(uploaded, user_id)
+        if upload:
+            resume_pdf_text = upload["text"]
+            source = "cached" if upload["cached"] else "extracted"
+            st.caption(f"📄 {uploaded.name}: {upload['pages']} pages, {len(resume_pdf_text)} characters ({source})")
+    elif user_id is not None:
+        saved = db.get_user_resume(user_id)
+        if saved and st.checkbox(f"Use my saved resume ({saved['filename'] or 'uploaded earlier'})", value=True):
+            resume_pdf_text = saved["text"]
+    
     resume_text = st.text_area(
         "Tell us about your background",
         placeholder="Share your work experience, notable projects, or achievements...",
@@ -185,6 +296,24 @@ def render_home_view():
     
     st.markdown('</div>', unsafe_allow_html=True)
     
+    interview_data = {
+        # Identifies this interview in LLM call metrics
+        "session_id": st.session_state.setdefault("pending_interview_id", uuid.uuid4().hex),
+        "user_id": st.session_state.user_data.get("id"),
+        "job_title": job_title,
+        "company": company,
+        "experience": experience,
+        "job_type": job_type,
+        "level": level,
+        "skills": skills,
+        "resume": "\n\n".join(part for part in (resume_pdf_text, resume_text) if part)
+    }
+    interview_data["resume_context"] = _resume_context(interview_data["resume"], job_title, level, skills)
+    
+    # Warm up the first question as soon as the essentials are filled in
+    if job_title and company:
+        prefetch_opening(interview_data)
+    
     # Action Buttons
     st.markdown("---")
     
@@ -193,16 +322,16 @@ def render_home_view():
     with col1:
         if st.button("🚀 Start Interview", use_container_width=True):
             if job_title and company:
-                st.session_state.interview_data = {
-                    "job_title": job_title,
-                    "company": company,
-                    "experience": experience,
-                    "job_type": job_type,
-                    "level": level,
-                    "skills": skills,
-                    "resume": resume_text
-                }
-                st.session_state.dash_view = "interview"
+                st.session_state.interview_data = interview_data
+                st.session_state.messages = []
+                st.session_state.interview_scores = {}
+                st.session_state.interview_complete = False
+                # Turns are recorded against this session from the first question on
+                db.start_interview_session(interview_data["session_id"], interview_data["user_id"],
+                                           job_title, interview_data)
+                prefetch_opening(interview_data)
+                del st.session_state["pending_interview_id"]
+                st.session_state.current_view = "interview"
                 st.success("✅ Configuration saved! Starting interview...")
                 st.rerun()
             else: